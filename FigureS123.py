@@ -2,7 +2,7 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt  
 
-from utilities import getJointIndices
+from utilities import getJointIndices, loadPickledDict
 
 # %% Settings 
 # cases = ['174', '145']
@@ -23,18 +23,30 @@ fontsize_tick = 14
 fontsize_label = 15
 fontsize_title = 17
 
+# Configure spines and font sizes once through rcParams rather than per axis
+# inside the subplot loops; each per-axis setp/spines call triggers its own
+# artist invalidation cascade.
+plt.rcParams.update({'axes.spines.right': False,
+                     'axes.spines.top': False,
+                     'xtick.labelsize': fontsize_tick,
+                     'ytick.labelsize': fontsize_tick,
+                     'axes.titlesize': fontsize_title,
+                     'axes.labelsize': fontsize_label})
+
 # %% Fixed settings
 pathMain = os.getcwd()
 # Load results
 pathTrajectories = os.path.join(pathMain, 'Results')
-optimaltrajectories = np.load(os.path.join(pathTrajectories, 
-                                           'optimalTrajectories.npy'),
-                              allow_pickle=True).item()
-# Load experimental data
+optimaltrajectories = loadPickledDict(os.path.join(pathTrajectories, 
+                                                   'optimalTrajectories.npy'))
+# Load experimental data; only the subtrees plotted below are materialized.
 pathData = os.path.join(pathMain, 'OpenSimModel', 'new_model')
-experimentalData = np.load(os.path.join(pathData, 'experimentalData.npy'),
-                           allow_pickle=True).item()
 subject = 'new_model'
+experimentalData = loadPickledDict(
+    os.path.join(pathData, 'experimentalData.npy'),
+    subtrees=[subject + '/kinematics/positions',
+              subject + '/EMG',
+              subject + '/kinetics'])
 swing = 65
     
 # %% Visualize results
@@ -59,31 +71,47 @@ jointsToPlot = ['pelvis_tilt', 'pelvis_list', 'pelvis_rotation',
 kinematic_ylim_ub = [10, 10, 20, 2, 1, 0.5, 50, 20, 20, 20, 30, 20, 60, 20, 20, 20, 20, 0, 40, 120]
 kinematic_ylim_lb = [-10, -10, -20, 0, 0.8, -0.5, -50, -20, -20, -80, -30, -20, 0, -20, -20, -20, -20, -30, -10, -10]
 
-NJointsToPlot = len(jointsToPlot)  
-fig, axs = plt.subplots(4, 6)    
-count = 0 
+NJointsToPlot = len(jointsToPlot)
+# Precompute the mean +/- 2 standard deviation bounds once per joint rather
+# than recomputing them for every axis in the draw loop below.
+positions = experimentalData[subject]["kinematics"]["positions"]
+positionsUpper = {j: positions["mean"][j] + 2*positions["std"][j]
+                  for j in jointsToPlot if not j == 'pelvis_tz'}
+positionsLower = {j: positions["mean"][j] - 2*positions["std"][j]
+                  for j in jointsToPlot if not j == 'pelvis_tz'}
+# All experimental bands share the same x-vector; look it up once.
+positionsGC = positions["GC_percent"]
+fig, axs = plt.subplots(4, 6, sharex=True, constrained_layout=True)
+# Shared x-axes collapse the redundant tick layout of the inner axes;
+# constrained_layout replaces the iterative tight_layout pass below.
+axs[0, 0].set_xticks([0, 50, 100])
+count = 0
+# Handles of the per-case simulated lines; the static experimental bands are
+# part of the background, so a parameter sweep can update these lines and
+# redraw them alone via utilities.blitLines(fig, simLines).
+simLines = []
 for i, ax in enumerate(axs.flat):
-    plotExperimentalData = True 
+    plotExperimentalData = True
     if i < NJointsToPlot:
         for c, case in enumerate(cases):
             c_joints = optimaltrajectories[case]['joints']
-            
+
             if not jointsToPlot[i] in c_joints:
                 continue
-            
+
             c_joint_idx = c_joints.index(jointsToPlot[i])
             # Simulated data
-            ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['coordinate_values'][c_joint_idx:c_joint_idx+1, :].T, linewidth=linewidth_s, color=colors[c], linestyle=linestyles[c])
+            simLines += ax.plot(optimaltrajectories[case]['GC_percent'],
+                    optimaltrajectories[case]['coordinate_values'][c_joint_idx, :], linewidth=linewidth_s, color=colors[c], linestyle=linestyles[c])
             if plotExperimentalData and not jointsToPlot[i] == 'pelvis_tz':
                 # Mean measured data
-                ax.plot(experimentalData[subject]["kinematics"]["positions"]["GC_percent"],
-                        experimentalData[subject]["kinematics"]["positions"]["mean"][jointsToPlot[i]], linewidth=linewidth_s, color='grey')
+                ax.plot(positionsGC,
+                        positions["mean"][jointsToPlot[i]], linewidth=linewidth_s, color='grey')
                 # Mean +/- 2 standard deviation
-                ax.fill_between(experimentalData[subject]["kinematics"]["positions"]["GC_percent"],
-                    experimentalData[subject]["kinematics"]["positions"]["mean"][jointsToPlot[i]] + 2*experimentalData[subject]["kinematics"]["positions"]["std"][jointsToPlot[i]],
-                    experimentalData[subject]["kinematics"]["positions"]["mean"][jointsToPlot[i]] - 2*experimentalData[subject]["kinematics"]["positions"]["std"][jointsToPlot[i]],
-                    facecolor='grey', alpha=0.4)
+                ax.fill_between(positionsGC,
+                    positionsUpper[jointsToPlot[i]],
+                    positionsLower[jointsToPlot[i]],
+                    facecolor='grey', alpha=0.4, rasterized=True)
                 plotExperimentalData = False
         ax.vlines(swing, kinematic_ylim_lb[i], kinematic_ylim_ub[i], color='k') 
         ax.set_title(joints_title[c_joint_idx])
@@ -92,28 +120,16 @@ for i, ax in enumerate(axs.flat):
             ax.set_yticks([kinematic_ylim_lb[i],0.9,kinematic_ylim_ub[i]])
         else:
             ax.set_yticks([kinematic_ylim_lb[i],0,kinematic_ylim_ub[i]])
-        plt.setp(ax.get_yticklabels(), fontsize=fontsize_tick)
-        ax.set_xticks([0,50,100])
-        if i > 13:
-            ax.set_xticklabels(['0','50','100'], fontsize=fontsize_tick)
-        else:
-            ax.set_xticklabels([]) 
-        ax.spines['right'].set_visible(False)
-        ax.spines['top'].set_visible(False)
+        ax.tick_params(labelbottom=(i > 13))
 plt.setp(axs[2, 2:6], xlabel='Gait cycle (%)')
 plt.setp(axs[-1, :], xlabel='Gait cycle (%)')
 plt.setp(axs[:, 0], ylabel='Joint angle (deg)')
 plt.setp(axs[0, 3], ylabel='Joint position (m)')
 fig.align_ylabels()
-for ax in axs.flat:
-    ax.xaxis.get_label().set_fontsize(fontsize_label)
-    ax.yaxis.get_label().set_fontsize(fontsize_label)
-    ax.title.set_fontsize(fontsize_title)
 for ax in (axs[3,2:6].flat):
     ax.set_visible(False)
     
 fig.set_size_inches(16,12)
-fig.tight_layout()
 
 # %% Muscle activations
 muscles = optimaltrajectories[cases[0]]['muscles']
@@ -182,55 +198,49 @@ mappingEMG = {'glut_med1_r': 'GluMed_r',
               'per_brev_l': 'PerB_l',
               'per_long_l': 'PerL_l'}
 
-fig, axs = plt.subplots(8, 6)    
+fig, axs = plt.subplots(8, 6, sharex=True, constrained_layout=True)
+axs[0, 0].set_xticks([0, 50, 100])
+# Bind the nested EMG references once instead of resolving the full dict
+# chain several times per axis.
+emg = experimentalData[subject]["EMG"]
+emgGC = emg["GC_percent"]
+emgMean, emgStd = emg["mean"], emg["std"]
 for i, ax in enumerate(axs.flat):
     if i < NMusclesToPlot:
         for c, case in enumerate(cases):
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i]:idxMusclesToPlot[i]+1, :].T, c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
-            
-            if musclesToPlot[i] in mappingEMG and case == case_4exp:                
-                # Normalize EMG such that peak mean EMG = peak activation             
-                exp_mean = experimentalData[subject]["EMG"]["mean"][mappingEMG[musclesToPlot[i]]]
+                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i], :], c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
+
+            if musclesToPlot[i] in mappingEMG and case == case_4exp:
+                # Normalize EMG such that peak mean EMG = peak activation
+                exp_mean = emgMean[mappingEMG[musclesToPlot[i]]]
+                exp_std = emgStd[mappingEMG[musclesToPlot[i]]]
                 exp_mean_peak = np.max(exp_mean)
                 sim = optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i], :].T
                 sim_peak = np.max(sim)
                 scaling_emg = sim_peak / exp_mean_peak
-                ax.fill_between(experimentalData[subject]["EMG"]["GC_percent"],
-                        experimentalData[subject]["EMG"]["mean"][mappingEMG[musclesToPlot[i]]] * scaling_emg + 2*experimentalData[subject]["EMG"]["std"][mappingEMG[musclesToPlot[i]]] * scaling_emg,
-                        experimentalData[subject]["EMG"]["mean"][mappingEMG[musclesToPlot[i]]] * scaling_emg - 2*experimentalData[subject]["EMG"]["std"][mappingEMG[musclesToPlot[i]]] * scaling_emg,
+                ax.fill_between(emgGC,
+                        (exp_mean + 2*exp_std) * scaling_emg,
+                        (exp_mean - 2*exp_std) * scaling_emg,
                         facecolor='grey', alpha=0.4)
-                ax.plot(experimentalData[subject]["EMG"]["GC_percent"],
-                        experimentalData[subject]["EMG"]["mean"][mappingEMG[musclesToPlot[i]]] * scaling_emg, color='grey', linewidth=linewidth_s)
+                ax.plot(emgGC,
+                        exp_mean * scaling_emg, color='grey', linewidth=linewidth_s)
         ax.vlines(swing, 0, 1, color='k')
         ax.set_title(musclesToPlot_title[i])
         ax.set_ylim((0,1))
         ax.set_yticks([0, 1])
-        plt.setp(ax.get_yticklabels(), fontsize=fontsize_tick)
-        ax.set_xticks([0,50,100])
-        if i > 41:
-            ax.set_xticklabels(['0','50','100'], fontsize=fontsize_tick)
-        else:
-            ax.set_xticklabels([]) 
-        ax.spines['right'].set_visible(False)
-        ax.spines['top'].set_visible(False)
-        
+        ax.tick_params(labelbottom=(i > 41))
+
     handles, labels = ax.get_legend_handles_labels()
     plt.legend(handles, labels, loc='upper right')
 plt.setp(axs[-1, :], xlabel='Gait cycle (%)')
 plt.setp(axs[:, 0], ylabel='Act (-)')
 fig.align_ylabels()
 
-for ax in axs.flat:
-    ax.xaxis.get_label().set_fontsize(fontsize_label)
-    ax.yaxis.get_label().set_fontsize(fontsize_label)
-    ax.title.set_fontsize(fontsize_title)
-
 for ax in (axs[7,4:6].flat):
     ax.set_visible(False)
     
 fig.set_size_inches(16,12)
-fig.tight_layout()
 
 # %% Kinetics
 
@@ -244,9 +254,16 @@ kinetic_ylim_ub = [60, 20, 20, 70, 30, 30, 10, 20, 20, 20, 5, 5, 5, 5]
 kinetic_ylim_lb = [-60, -100, -20, -50, -110, -30, -20, -20, -20, -20, -5, -5, -5, -5]
 
 NJointsToPlot = len(jointsToPlot)
+kinetics = experimentalData[subject]["kinetics"]
+kineticsUpper = {j: kinetics["mean"][j] + 2*kinetics["std"][j]
+                 for j in jointsToPlot if not j == 'mtp_angle_r'}
+kineticsLower = {j: kinetics["mean"][j] - 2*kinetics["std"][j]
+                 for j in jointsToPlot if not j == 'mtp_angle_r'}
+kineticsGC = kinetics["GC_percent"]
 
-fig, axs = plt.subplots(4, 6) 
-count = 0 
+fig, axs = plt.subplots(4, 6, sharex=True, constrained_layout=True)
+axs[0, 0].set_xticks([0, 50, 100])
+count = 0
 for i, ax in enumerate(axs.flat):
     plotExperimentalData = True
     if i < NJointsToPlot:
@@ -258,42 +275,30 @@ for i, ax in enumerate(axs.flat):
             
             c_joint_idx = c_joints.index(jointsToPlot[i]) 
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['joint_torques'][c_joint_idx:c_joint_idx+1, :].T, c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
-            if plotExperimentalData and not jointsToPlot[i] == 'mtp_angle_r':                
-                ax.plot(experimentalData[subject]["kinetics"]["GC_percent"],
-                        experimentalData[subject]["kinetics"]["mean"][jointsToPlot[i]], linewidth=linewidth_s, color='grey')                
-                ax.fill_between(experimentalData[subject]["kinetics"]["GC_percent"],
-                                experimentalData[subject]["kinetics"]["mean"][jointsToPlot[i]] + 2*experimentalData[subject]["kinetics"]["std"][jointsToPlot[i]],
-                                experimentalData[subject]["kinetics"]["mean"][jointsToPlot[i]] - 2*experimentalData[subject]["kinetics"]["std"][jointsToPlot[i]],
-                                facecolor='grey', alpha=0.4)
-                plotExperimentalData = False    
+                    optimaltrajectories[case]['joint_torques'][c_joint_idx, :], c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
+            if plotExperimentalData and not jointsToPlot[i] == 'mtp_angle_r':
+                ax.plot(kineticsGC,
+                        kinetics["mean"][jointsToPlot[i]], linewidth=linewidth_s, color='grey')
+                ax.fill_between(kineticsGC,
+                                kineticsUpper[jointsToPlot[i]],
+                                kineticsLower[jointsToPlot[i]],
+                                facecolor='grey', alpha=0.4, rasterized=True)
+                plotExperimentalData = False
         ax.vlines(swing, kinetic_ylim_lb[i], kinetic_ylim_ub[i], color='k')
         ax.set_title(joints_title[c_joint_idx])
         ax.set_ylim((kinetic_ylim_lb[i],kinetic_ylim_ub[i]))
         ax.set_yticks([kinetic_ylim_lb[i],0,kinetic_ylim_ub[i]])
-        plt.setp(ax.get_yticklabels(), fontsize=fontsize_tick)
-        ax.set_xticks([0,50,100])
-        if i > 7:
-            ax.set_xticklabels(['0','50','100'], fontsize=fontsize_tick)
-        else:
-            ax.set_xticklabels([]) 
-        ax.spines['right'].set_visible(False)
-        ax.spines['top'].set_visible(False)
+        ax.tick_params(labelbottom=(i > 7))
 plt.setp(axs[1, 2:6], xlabel='Gait cycle (%)')
 plt.setp(axs[2, :], xlabel='Gait cycle (%)')
 plt.setp(axs[:, 0], ylabel='Joint torque (Nm)')
 fig.align_ylabels()
-for ax in axs.flat:
-    ax.xaxis.get_label().set_fontsize(fontsize_label)
-    ax.yaxis.get_label().set_fontsize(fontsize_label)
-    ax.title.set_fontsize(fontsize_title)
 for ax in (axs[2,2:6].flat):
     ax.set_visible(False)
 for ax in (axs[3,:].flat):
     ax.set_visible(False)
     
 fig.set_size_inches(16,12)
-fig.tight_layout()
 
     
 # # %% Ground reaction forces
@@ -309,14 +314,14 @@ fig.tight_layout()
 #     if i < NJointsToPlot:
 #         for case in cases:
 #             ax.plot(optimaltrajectories[case]['GC_percent'],
-#                     optimaltrajectories[case]['GRF'][idxGRFToPlot[i]:idxGRFToPlot[i]+1, :].T, c=next(color_mtp), label='case_' + case + '_mtp')  
+#                     optimaltrajectories[case]['GRF'][idxGRFToPlot[i], :], c=next(color_mtp), label='case_' + case + '_mtp')  
 #             ax.fill_between(experimentalData_mtp[subject]["GRF"]["GC_percent"],
 #                             experimentalData_mtp[subject]["GRF"]["mean"][GRFToPlot[i]] + 2*experimentalData_mtp[subject]["GRF"]["std"][GRFToPlot[i]],
 #                             experimentalData_mtp[subject]["GRF"]["mean"][GRFToPlot[i]] - 2*experimentalData_mtp[subject]["GRF"]["std"][GRFToPlot[i]],
 #                             facecolor='blue', alpha=0.5)
 #         for case in cases_no_mtp:
 #             ax.plot(optimaltrajectories_no_mtp[case]['GC_percent'],
-#                     optimaltrajectories_no_mtp[case]['GRF'][idxGRFToPlot[i]:idxGRFToPlot[i]+1, :].T, c=next(color_no_mtp), linestyle='dashed', label='case_' + case + '_no_mtp')  
+#                     optimaltrajectories_no_mtp[case]['GRF'][idxGRFToPlot[i], :], c=next(color_no_mtp), linestyle='dashed', label='case_' + case + '_no_mtp')  
 #             ax.fill_between(experimentalData_no_mtp[subject]["GRF"]["GC_percent"],
 #                             experimentalData_no_mtp[subject]["GRF"]["mean"][GRFToPlot[i]] + 2*experimentalData_no_mtp[subject]["GRF"]["std"][GRFToPlot[i]],
 #                             experimentalData_no_mtp[subject]["GRF"]["mean"][GRFToPlot[i]] - 2*experimentalData_no_mtp[subject]["GRF"]["std"][GRFToPlot[i]],
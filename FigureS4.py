@@ -2,7 +2,7 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt  
 
-from utilities import getJointIndices
+from utilities import getJointIndices, loadPickledDict
 
 # %% Settings
 cases = ['4', '38', '40', '34', '37']
@@ -24,13 +24,12 @@ fontsize_title = 17
 pathMain = os.getcwd()
 # Load results
 pathTrajectories = os.path.join(pathMain, 'Results')
-optimaltrajectories = np.load(os.path.join(pathTrajectories, 
-                                           'optimalTrajectories.npy'),
-                              allow_pickle=True).item()
+optimaltrajectories = loadPickledDict(os.path.join(pathTrajectories, 
+                                                   'optimalTrajectories.npy'))
 # Load experimental data
 pathData = os.path.join(pathMain, 'OpenSimModel', 'new_model')
-experimentalData = np.load(os.path.join(pathData, 'experimentalData.npy'),
-                           allow_pickle=True).item()
+experimentalData = loadPickledDict(os.path.join(pathData, 
+                                                'experimentalData.npy'))
 subject = 'new_model'
 swing = 65
     
@@ -54,7 +53,7 @@ for i, ax in enumerate(axs[0, :]):
             c_joint_idx = c_joints.index(jointsToPlot[i])            
             # Simulated data
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['coordinate_values'][c_joint_idx:c_joint_idx+1, :].T, linewidth=linewidth_s, color=colors[c], linestyle=linestyles[c])
+                    optimaltrajectories[case]['coordinate_values'][c_joint_idx, :], linewidth=linewidth_s, color=colors[c], linestyle=linestyles[c])
             if plotExperimentalData:
                 # Mean measured data
                 ax.plot(experimentalData[subject]["kinematics"]["positions"]["GC_percent"],
@@ -147,7 +146,7 @@ for i, ax in enumerate(axs[0:1,2:].flat):
     if i < NMusclesToPlot:
         for c, case in enumerate(cases):
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i]:idxMusclesToPlot[i]+1, :].T, c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
+                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i], :], c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
             
             if musclesToPlot[i] in mappingEMG and case == case_4exp:                
                 # Normalize EMG such that peak mean EMG = peak activation             
@@ -191,7 +190,7 @@ for i, ax in enumerate(axs[1,:]):
             c_joints = optimaltrajectories[case]['joints']
             c_joint_idx = c_joints.index(jointsToPlot[i]) 
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['joint_torques'][c_joint_idx:c_joint_idx+1, :].T, c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
+                    optimaltrajectories[case]['joint_torques'][c_joint_idx, :], c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s, label='case_' + case + '_no_mtp')
             if plotExperimentalData:                
                 ax.plot(experimentalData[subject]["kinetics"]["GC_percent"],
                         experimentalData[subject]["kinetics"]["mean"][jointsToPlot[i]], linewidth=linewidth_s, color='grey')                
@@ -224,7 +223,7 @@ for i, ax in enumerate(axs[1,2:]):
     if i < NGRFToPlot:        
         for c, case in enumerate(cases):
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['GRF'][idxGRFToPlot[i]:idxGRFToPlot[i]+1, :].T, c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s)
+                    optimaltrajectories[case]['GRF'][idxGRFToPlot[i], :], c=colors[c], linestyle=linestyles[c], linewidth=linewidth_s)
             if case == case_4exp:
                 ax.fill_between(experimentalData[subject]["GRF"]["GC_percent"],
                                 experimentalData[subject]["GRF"]["mean"][GRFToPlot[i]] + 2*experimentalData[subject]["GRF"]["std"][GRFToPlot[i]],
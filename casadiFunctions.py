@@ -6,6 +6,17 @@
 # %% Import packages.
 import casadi as ca
 import numpy as np
+from shutil import which
+
+# %% Options to JIT-compile the functions sitting in the NLP hot path
+# (evaluated at every IPOPT iteration). CasADi generates C code and builds
+# a shared library at construction time; without a C compiler on the path
+# the functions simply run in the CasADi virtual machine as before.
+if which('gcc') or which('cc'):
+    jitOpts = {'jit': True, 'compiler': 'shell',
+               'jit_options': {'flags': ['-O3'], 'verbose': False}}
+else:
+    jitOpts = {}
 
 # %% CasADi function to approximate muscle-tendon lenghts, velocities,
 # and moment arms based on joint positions and velocities.
@@ -40,7 +51,8 @@ def polynomialApproximation(musclesPolynomials, polynomialData, NPolynomial):
             vMT[count] += (-dM[count, idxSpanning[i]] * 
                qdotin[0, idxSpanning[i]])
         
-    f_polynomial = ca.Function('f_polynomial',[qin, qdotin],[lMT, vMT, dM])
+    f_polynomial = ca.Function('f_polynomial', [qin, qdotin],
+                               [lMT, vMT, dM], jitOpts)
     
     return f_polynomial
         
@@ -86,7 +98,8 @@ def hillEquilibrium(mtParameters, tendonCompliance, specificTension):
                                      [hillEquilibrium, tendonForce,
                                       activeFiberForce, passiveFiberForce,
                                       normActiveFiberLengthForce,
-                                      normFiberLength, fiberVelocity]) 
+                                      normFiberLength, fiberVelocity],
+                                    jitOpts)
     
     return f_hillEquilibrium
 
@@ -169,7 +182,8 @@ def metabolicsBhargava(slowTwitchRatio, maximalIsometricForce,
                                      normActiveFiberLengthForce], 
                                      [activationHeatRate, maintenanceHeatRate,
                                       shorteningHeatRate, mechanicalWork, 
-                                      totalHeatRate, metabolicEnergyRate])
+                                      totalHeatRate, metabolicEnergyRate],
+                                    jitOpts)
     
     return f_metabolicsBhargava
 
@@ -184,10 +198,32 @@ def getLimitTorques(k, theta, d):
                            np.exp(k[3] * (Q - theta[0])) - d * Qdot)
     
     f_passiveJointTorque = ca.Function('f_passiveJointTorque', [Q, Qdot], 
-                                       [passiveJointTorque])
+                                       [passiveJointTorque], jitOpts)
     
     return f_passiveJointTorque
 
+# %% CasADi function to compute the passive (limit) torques of all joints
+# at once. k and theta stack the per-joint parameters row-wise, so one call
+# returns the full torque vector instead of one CasADi call per joint.
+def getLimitTorquesAll(k, theta, d):
+    
+    k = ca.DM(k)
+    theta = ca.DM(theta)
+    nJoints = k.shape[0]
+    
+    # Function variables.
+    Q = ca.SX.sym('Q', nJoints)
+    Qdot = ca.SX.sym('Qdot', nJoints)
+    
+    passiveJointTorques = (k[:, 0] * ca.exp(k[:, 1] * (Q - theta[:, 1])) + 
+                           k[:, 2] * ca.exp(k[:, 3] * (Q - theta[:, 0])) - 
+                           d * Qdot)
+    
+    f_passiveJointTorques = ca.Function('f_passiveJointTorques', [Q, Qdot], 
+                                        [passiveJointTorques], jitOpts)
+    
+    return f_passiveJointTorques
+
 # %% CasADi function to compute linear passive joint torques.
 def getLinearPassiveTorques(k, d):
     
@@ -10,6 +10,25 @@ import numpy as np
 import scipy.interpolate as interpolate
 from scipy.interpolate import interp1d
 
+# %% Final-time guess as a function of target speed. The speed / final-time
+# table is fixed, so it is built once here and shared by both guess classes.
+_allSpeeds = np.linspace(0.73, 2.73, 21)
+_allFinalTimes = np.linspace(0.70, 0.35, 21)
+
+def _getGuessFinalTime(targetSpeed):
+    idxTargetSpeed = np.argmax(_allSpeeds >= targetSpeed)
+    
+    return _allFinalTimes[idxTargetSpeed]
+
+# %% Constant-valued guess shared by both classes: a dense matrix of a single
+# value, optionally divided by the per-column scaling in one broadcast.
+def _constantGuess(value, nRows, columns, scaling=None):
+    g = np.full((nRows, len(columns)), value)
+    if scaling is not None:
+        g = g / scaling.iloc[0][columns].to_numpy()
+        
+    return pd.DataFrame(g, columns=columns)
+
 # %% This class sets a cold-start guess for the optimization variables.
 # All variables are constant except for the pelvis moving forward at a
 # constant speed.
@@ -23,181 +42,133 @@ class coldStart:
         self.muscles = muscles
         
     def getGuessFinalTime(self):
-        allSpeeds = np.linspace(0.73, 2.73,  21)
-        allFinalTimes = np.linspace(0.70, 0.35, 21)
-        idxTargetSpeed = np.argmax(allSpeeds >= self.targetSpeed)
-        self.guessFinalTime = allFinalTimes[idxTargetSpeed]
+        self.guessFinalTime = _getGuessFinalTime(self.targetSpeed)
         
         return self.guessFinalTime
     
     # Mesh points.
+    # All guesses are constant, so they are filled as dense matrices and
+    # scaled with a single broadcast division.
     def getGuessPosition(self, scaling):
-        g = [0] * (self.N + 1)
-        g_pelvis_tx = np.linspace(0, self.guessFinalTime * self.targetSpeed, 
-                                  self.N)
-        g_pelvis_tx = np.append(g_pelvis_tx, g_pelvis_tx[-1] + 
-                                (g_pelvis_tx[-1] - g_pelvis_tx[-2]))
-        g_pelvis_ty =  [0.9385] * (self.N + 1)
-        self.guessPosition = pd.DataFrame()  
-        for count, joint in enumerate(self.joints): 
-            if joint == 'pelvis_tx':
-                self.guessPosition.insert(count, joint, 
-                                          g_pelvis_tx / scaling.iloc[0][joint])
-            elif joint == 'pelvis_ty':
-                self.guessPosition.insert(count, joint, 
-                                          g_pelvis_ty / scaling.iloc[0][joint])                    
-            else:
-                self.guessPosition.insert(count, joint, 
-                                          g / scaling.iloc[0][joint])
+        scale = scaling.iloc[0][self.joints].to_numpy()
+        g = np.zeros((self.N + 1, len(self.joints)))
+        dx = self.guessFinalTime * self.targetSpeed / (self.N - 1)
+        g[:, self.joints.index('pelvis_tx')] = np.arange(self.N + 1) * dx
+        g[:, self.joints.index('pelvis_ty')] = 0.9385
+        self.guessPosition = pd.DataFrame(g / scale, columns=self.joints)
         
         return self.guessPosition
     
     def getGuessVelocity(self, scaling):
-        g = [0] * (self.N + 1)
-        g_pelvis_tx =  [self.targetSpeed] * (self.N + 1)
-        self.guessVelocity = pd.DataFrame()  
-        for count, joint in enumerate(self.joints): 
-            if joint == 'pelvis_tx':
-                self.guessVelocity.insert(count, joint,
-                                          g_pelvis_tx / scaling.iloc[0][joint])             
-            else:
-                self.guessVelocity.insert(count, joint, 
-                                          g / scaling.iloc[0][joint])
+        scale = scaling.iloc[0][self.joints].to_numpy()
+        g = np.zeros((self.N + 1, len(self.joints)))
+        g[:, self.joints.index('pelvis_tx')] = self.targetSpeed
+        self.guessVelocity = pd.DataFrame(g / scale, columns=self.joints)
         
         return self.guessVelocity
     
     def getGuessAcceleration(self, scaling):
-        g = [0] * self.N
-        self.guessAcceleration = pd.DataFrame()  
-        for count, joint in enumerate(self.joints):
-            self.guessAcceleration.insert(count, joint, 
-                                          g / scaling.iloc[0][joint])
+        g = np.zeros((self.N, len(self.joints)))
+        self.guessAcceleration = pd.DataFrame(g, columns=self.joints)
             
         return self.guessAcceleration
     
     def getGuessActivation(self, scaling):
-        g = [0.1] * (self.N + 1)
-        self.guessActivation = pd.DataFrame()  
-        for count, muscle in enumerate(self.muscles):
-            self.guessActivation.insert(count, muscle, 
-                                        g / scaling.iloc[0][muscle])
+        self.guessActivation = _constantGuess(0.1, self.N + 1, self.muscles,
+                                              scaling)
             
         return self.guessActivation
     
     def getGuessActivationDerivative(self, scaling):
-        g = [0.01] * self.N
-        guessActivationDerivative = pd.DataFrame()  
-        for count, muscle in enumerate(self.muscles):
-            guessActivationDerivative.insert(count, muscle, 
-                                             g / scaling.iloc[0][muscle])
+        guessActivationDerivative = _constantGuess(0.01, self.N,
+                                                   self.muscles, scaling)
             
         return guessActivationDerivative
     
     def getGuessForce(self, scaling):
-        g = [0.1] * (self.N + 1)
-        self.guessForce = pd.DataFrame()  
-        for count, muscle in enumerate(self.muscles):
-            self.guessForce.insert(count, muscle, g / scaling.iloc[0][muscle])
+        self.guessForce = _constantGuess(0.1, self.N + 1, self.muscles,
+                                         scaling)
             
         return self.guessForce
     
     def getGuessForceDerivative(self, scaling):
-        g = [0.01] * self.N
-        self.guessForceDerivative = pd.DataFrame()  
-        for count, muscle in enumerate(self.muscles):
-            self.guessForceDerivative.insert(count, muscle, 
-                                        g / scaling.iloc[0][muscle])
+        self.guessForceDerivative = _constantGuess(0.01, self.N,
+                                                   self.muscles, scaling)
             
         return self.guessForceDerivative
     
     def getGuessTorqueActuatorActivation(self, torqueActuatorJoints):
-        g = [0.1] * (self.N + 1)
-        self.guessTorqueActuatorActivation = pd.DataFrame()  
-        for count, torqueActuatorJoint in enumerate(torqueActuatorJoints):
-            self.guessTorqueActuatorActivation.insert(
-                    count, torqueActuatorJoint, g)
+        self.guessTorqueActuatorActivation = _constantGuess(
+                0.1, self.N + 1, torqueActuatorJoints)
             
         return self.guessTorqueActuatorActivation
     
     def getGuessTorqueActuatorExcitation(self, torqueActuatorJoints):
-        g = [0.1] * self.N
-        guessTorqueActuatorExcitation = pd.DataFrame()  
-        for count, torqueActuatorJoint in enumerate(torqueActuatorJoints):
-            guessTorqueActuatorExcitation.insert(count, torqueActuatorJoint, g)
+        guessTorqueActuatorExcitation = _constantGuess(
+                0.1, self.N, torqueActuatorJoints)
             
         return guessTorqueActuatorExcitation 
     
     # Collocation points.
-    def getGuessActivationCol(self):            
-        guessActivationCol = pd.DataFrame(columns=self.muscles)          
-        for k in range(self.N):
-            for c in range(self.d):          
-                guessActivationCol = guessActivationCol.append(
-                        self.guessActivation.iloc[k], ignore_index=True)
+    # Each mesh-point guess row is repeated d times in one shot; appending
+    # row by row reallocates the whole DataFrame on every iteration.
+    def getGuessActivationCol(self):
+        guessActivationCol = pd.DataFrame(
+                np.repeat(self.guessActivation.to_numpy()[:self.N], self.d,
+                          axis=0), columns=self.muscles, copy=False)
             
         return guessActivationCol
     
     def getGuessForceCol(self):
-        guessForceCol = pd.DataFrame(columns=self.muscles)          
-        for k in range(self.N):
-            for c in range(self.d):          
-                guessForceCol = guessForceCol.append(
-                        self.guessForce.iloc[k], ignore_index=True)
+        guessForceCol = pd.DataFrame(
+                np.repeat(self.guessForce.to_numpy()[:self.N], self.d,
+                          axis=0), columns=self.muscles, copy=False)
             
         return guessForceCol
     
     def getGuessForceDerivativeCol(self):
-        guessForceDerivativeCol = pd.DataFrame(columns=self.muscles)          
-        for k in range(self.N):
-            for c in range(self.d):          
-                guessForceDerivativeCol = guessForceDerivativeCol.append(
-                        self.guessForceDerivative.iloc[k], ignore_index=True)
+        guessForceDerivativeCol = pd.DataFrame(
+                np.repeat(self.guessForceDerivative.to_numpy()[:self.N],
+                          self.d, axis=0), columns=self.muscles,
+                copy=False)
             
         return guessForceDerivativeCol
     
     def getGuessTorqueActuatorActivationCol(self, torqueActuatorJoints):
-        guessTorqueActuatorActivationCol = (
-                pd.DataFrame(columns=torqueActuatorJoints))         
-        for k in range(self.N):
-            for c in range(self.d):          
-                guessTorqueActuatorActivationCol = (
-                        guessTorqueActuatorActivationCol.append(
-                        self.guessTorqueActuatorActivation.iloc[k], 
-                        ignore_index=True))
+        guessTorqueActuatorActivationCol = pd.DataFrame(
+                np.repeat(
+                        self.guessTorqueActuatorActivation.to_numpy()[:self.N],
+                        self.d, axis=0), columns=torqueActuatorJoints,
+                copy=False)
             
         return guessTorqueActuatorActivationCol        
     
     def getGuessPositionCol(self):
-        guessPositionCol = pd.DataFrame(columns=self.joints)          
-        for k in range(self.N):
-            for c in range(self.d):          
-                guessPositionCol = guessPositionCol.append(
-                        self.guessPosition.iloc[k], ignore_index=True)
+        guessPositionCol = pd.DataFrame(
+                np.repeat(self.guessPosition.to_numpy()[:self.N], self.d,
+                          axis=0), columns=self.joints, copy=False)
         
         return guessPositionCol
     
     def getGuessVelocityCol(self):
-        guessVelocityCol = pd.DataFrame(columns=self.joints)       
-        for k in range(self.N):
-            for c in range(self.d):          
-                guessVelocityCol = guessVelocityCol.append(
-                        self.guessVelocity.iloc[k], ignore_index=True)
+        guessVelocityCol = pd.DataFrame(
+                np.repeat(self.guessVelocity.to_numpy()[:self.N], self.d,
+                          axis=0), columns=self.joints, copy=False)
         
         return guessVelocityCol
     
     def getGuessAccelerationCol(self):
-        guessAccelerationCol = pd.DataFrame(columns=self.joints)  
-        for k in range(self.N):
-            for c in range(self.d):          
-                guessAccelerationCol = guessAccelerationCol.append(
-                        self.guessAcceleration.iloc[k], ignore_index=True)
+        guessAccelerationCol = pd.DataFrame(
+                np.repeat(self.guessAcceleration.to_numpy()[:self.N], self.d,
+                          axis=0), columns=self.joints, copy=False)
                 
         return guessAccelerationCol
     
 # %% This class sets a hot-start guess for the optimization variables.
 # Joints positions, velocities, and accelerations are based on experimental
-# data. Muscle variables are set to constant values.
-class hotStart:
+# data. Muscle variables are set to constant values, so the corresponding
+# getters (and the collocation expansions) are inherited from coldStart.
+class hotStart(coldStart):
     
     def __init__(self, Qs, N, d, joints, muscles, targetSpeed, 
                  periodicQsJointsA, periodicQdotsJointsA, 
@@ -212,57 +183,67 @@ class hotStart:
         self.periodicQsJointsA = periodicQsJointsA
         self.periodicOppositeJoints = periodicOppositeJoints
         self.periodicQdotsJointsA = periodicQdotsJointsA
+        self._splined = False
+        self._interpolated = False
         
-    def splineQs(self):        
+    def splineQs(self):
+        if self._splined:
+            return
         self.Qs_spline = self.Qs.copy()
         self.Qdots_spline = self.Qs.copy()
         self.Qdotdots_spline = self.Qs.copy()
 
-        for joint in self.joints:
-            spline = interpolate.InterpolatedUnivariateSpline(self.Qs['time'], 
-                                                              self.Qs[joint],
-                                                              k=3)
-            self.Qs_spline[joint] = spline(self.Qs['time'])
-            splineD1 = spline.derivative(n=1)
-            self.Qdots_spline[joint] = splineD1(self.Qs['time'])
-            splineD2 = spline.derivative(n=2)
-            self.Qdotdots_spline[joint] = splineD2(self.Qs['time'])
+        t = self.Qs['time'].to_numpy()
+        spline = interpolate.CubicSpline(t, self.Qs[self.joints].to_numpy(),
+                                         axis=0)
+        # The spline interpolates the data, so evaluating it at its own
+        # knots would just return the input values: Qs_spline stays the
+        # copy of Qs made above and only the derivatives are evaluated.
+        self.Qdots_spline[self.joints] = spline(t, 1)
+        self.Qdotdots_spline[self.joints] = spline(t, 2)
+        self._splined = True
+        # Keep the dense derivative matrices around: interpQs resamples
+        # them without going back through the DataFrames.
+        self._Qs_spline_arr = self.Qs[self.joints].to_numpy()
+        self._Qdots_spline_arr = self.Qdots_spline[self.joints].to_numpy()
+        self._Qdotdots_spline_arr = (
+                self.Qdotdots_spline[self.joints].to_numpy())
             
     def interpQs(self):
+        if self._interpolated:
+            return
         self.splineQs()            
         tOut = np.linspace(self.Qs['time'].iloc[0], 
                            self.Qs['time'].iloc[-1], 
                            self.N + 1)    
         
-        self.Qs_spline_interp = pd.DataFrame()  
-        self.Qdots_spline_interp = pd.DataFrame()  
-        self.Qdotdots_spline_interp = pd.DataFrame()  
-        for count, joint in enumerate(self.joints):  
-            set_interp = interp1d(self.Qs['time'], self.Qs_spline[joint])
-            self.Qs_spline_interp.insert(count, joint, set_interp(tOut))
-            
-            set_interp = interp1d(self.Qs['time'], self.Qdots_spline[joint])
-            self.Qdots_spline_interp.insert(count, joint, set_interp(tOut))
-            
-            set_interp = interp1d(self.Qs['time'], self.Qdotdots_spline[joint])
-            self.Qdotdots_spline_interp.insert(count, joint, set_interp(tOut))
+        tIn = self.Qs['time'].to_numpy()
+        self.Qs_spline_interp = pd.DataFrame(
+                interp1d(tIn, self._Qs_spline_arr, axis=0)(tOut),
+                columns=self.joints)
+        self.Qdots_spline_interp = pd.DataFrame(
+                interp1d(tIn, self._Qdots_spline_arr, axis=0)(tOut),
+                columns=self.joints)
+        self.Qdotdots_spline_interp = pd.DataFrame(
+                interp1d(tIn, self._Qdotdots_spline_arr, axis=0)(tOut),
+                columns=self.joints)
+        self._interpolated = True
         
     def getGuessFinalTime(self):
-        allSpeeds = np.linspace(0.73, 2.73,  21)
-        allFinalTimes = np.linspace(0.70, 0.35, 21)
-        idxTargetSpeed = np.argmax(allSpeeds >= self.targetSpeed)
-        self.guessFinalTime = allFinalTimes[idxTargetSpeed]
+        self.guessFinalTime = _getGuessFinalTime(self.targetSpeed)
         
         return self.guessFinalTime
     
     # Mesh points.
+    # The splined data are scaled as one contiguous matrix with a single
+    # broadcast division; the DataFrame is only a labelled view on top so
+    # that downstream code can keep indexing by joint name.
     def getGuessPosition(self, scaling, adjustInitialStatePelvis_tx=True):
+        scale = scaling.iloc[0][self.joints].to_numpy()
         self.interpQs()
-        self.guessPosition = pd.DataFrame()
-        for count, joint in enumerate(self.joints):
-            self.guessPosition.insert(count, joint, 
-                                      self.Qs_spline_interp[joint] / 
-                                      scaling.iloc[0][joint])        
+        guessPosition = self.Qs_spline_interp.to_numpy() / scale
+        self.guessPosition = pd.DataFrame(guessPosition,
+                                          columns=self.joints)
         if adjustInitialStatePelvis_tx:        
             self.guessPosition['pelvis_tx'] -= (
                     self.guessPosition.iloc[0]['pelvis_tx'])
@@ -270,144 +251,21 @@ class hotStart:
         return self.guessPosition
     
     def getGuessVelocity(self, scaling):
+        scale = scaling.iloc[0][self.joints].to_numpy()
         self.interpQs()
-        self.guessVelocity = pd.DataFrame()
-        for count, joint in enumerate(self.joints):
-            self.guessVelocity.insert(count, joint, 
-                                      self.Qdots_spline_interp[joint] / 
-                                      scaling.iloc[0][joint])
+        guessVelocity = self.Qdots_spline_interp.to_numpy() / scale
+        self.guessVelocity = pd.DataFrame(guessVelocity, columns=self.joints)
         
         return self.guessVelocity
     
     def getGuessAcceleration(self, scaling, nullGuessAcceleration=False):
+        scale = scaling.iloc[0][self.joints].to_numpy()
         self.interpQs()
-        self.guessAcceleration = pd.DataFrame()  
-        g = [0] * self.N
-        for count, joint in enumerate(self.joints):                              
-            if nullGuessAcceleration:
-                self.guessAcceleration.insert(count, joint,
-                                              g / scaling.iloc[0][joint])
-            else:
-                self.guessAcceleration.insert(
-                    count, joint, self.Qdotdots_spline_interp[joint] /
-                    scaling.iloc[0][joint]) 
+        if nullGuessAcceleration:
+            guessAcceleration = np.zeros((self.N, len(self.joints)))
+        else:
+            guessAcceleration = self.Qdotdots_spline_interp.to_numpy() / scale
+        self.guessAcceleration = pd.DataFrame(guessAcceleration,
+                                              columns=self.joints)
                     
         return self.guessAcceleration
-    
-    def getGuessActivation(self, scaling):
-        g = [0.1] * (self.N + 1)
-        self.guessActivation = pd.DataFrame()  
-        for count, muscle in enumerate(self.muscles):
-            self.guessActivation.insert(count, muscle, 
-                                        g / scaling.iloc[0][muscle])
-            
-        return self.guessActivation
-    
-    def getGuessActivationDerivative(self, scaling):
-        g = [0.01] * self.N
-        guessActivationDerivative = pd.DataFrame()  
-        for count, muscle in enumerate(self.muscles):
-            guessActivationDerivative.insert(count, muscle, 
-                                             g / scaling.iloc[0][muscle])
-            
-        return guessActivationDerivative
-    
-    def getGuessForce(self, scaling):
-        g = [0.1] * (self.N + 1)
-        self.guessForce = pd.DataFrame()  
-        for count, muscle in enumerate(self.muscles):
-            self.guessForce.insert(count, muscle, g / scaling.iloc[0][muscle])
-            
-        return self.guessForce
-    
-    def getGuessForceDerivative(self, scaling):
-        g = [0.01] * self.N
-        self.guessForceDerivative = pd.DataFrame()  
-        for count, muscle in enumerate(self.muscles):
-            self.guessForceDerivative.insert(count, muscle, 
-                                        g / scaling.iloc[0][muscle])
-            
-        return self.guessForceDerivative
-    
-    def getGuessTorqueActuatorActivation(self, torqueActuatorJoints):
-        g = [0.1] * (self.N + 1)
-        self.guessTorqueActuatorActivation = pd.DataFrame()  
-        for count, torqueActuatorJoint in enumerate(torqueActuatorJoints):
-            self.guessTorqueActuatorActivation.insert(
-                    count, torqueActuatorJoint, g)
-            
-        return self.guessTorqueActuatorActivation
-    
-    def getGuessTorqueActuatorExcitation(self, torqueActuatorJoints):
-        g = [0.1] * self.N
-        guessTorqueActuatorExcitation = pd.DataFrame()  
-        for count, torqueActuatorJoint in enumerate(torqueActuatorJoints):
-            guessTorqueActuatorExcitation.insert(
-                    count, torqueActuatorJoint, g)
-            
-        return guessTorqueActuatorExcitation   
-    
-    # Collocation points.
-    def getGuessActivationCol(self):            
-        temp = []
-        for k in range(self.N):
-            for c in range(self.d):
-                temp.append(self.guessActivation.iloc[k])
-        guessActivationCol = pd.DataFrame.from_records(temp)
-        
-        return guessActivationCol
-    
-    def getGuessForceCol(self):
-        temp = []
-        for k in range(self.N):
-            for c in range(self.d):          
-                temp.append(self.guessForce.iloc[k])
-        guessForceCol = pd.DataFrame.from_records(temp)
-            
-        return guessForceCol
-    
-    def getGuessForceDerivativeCol(self):
-        temp = []         
-        for k in range(self.N):
-            for c in range(self.d):
-                temp.append(self.guessForceDerivative.iloc[k])
-        guessForceDerivativeCol = pd.DataFrame.from_records(temp)
-            
-        return guessForceDerivativeCol
-    
-    def getGuessTorqueActuatorActivationCol(self, torqueActuatorJoints):
-        temp = []
-        for k in range(self.N):
-            for c in range(self.d):
-                temp.append(self.guessTorqueActuatorActivation.iloc[k])
-        guessTorqueActuatorActivationCol = pd.DataFrame.from_records(temp)
-            
-        return guessTorqueActuatorActivationCol  
-    
-    def getGuessPositionCol(self):
-        temp = []
-        for k in range(self.N):
-            for c in range(self.d):
-                temp.append(self.guessPosition.iloc[k])
-        guessPositionCol = pd.DataFrame.from_records(temp)
-        
-        return guessPositionCol
-    
-    def getGuessVelocityCol(self):
-        temp = []      
-        for k in range(self.N):
-            for c in range(self.d):
-                temp.append(self.guessVelocity.iloc[k])
-        guessVelocityCol = pd.DataFrame.from_records(temp)
-        
-        return guessVelocityCol
-    
-    def getGuessAccelerationCol(self):
-        temp = []
-        guessAccelerationCol = pd.DataFrame(columns=self.joints)  
-        for k in range(self.N):
-            for c in range(self.d):
-                temp.append(self.guessAcceleration.iloc[k])
-        guessAccelerationCol = pd.DataFrame.from_records(temp)
-                
-        return guessAccelerationCol    
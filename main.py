@@ -30,9 +30,36 @@
 import os
 import casadi as ca
 import numpy as np
-import copy
 import platform
 
+# The external functions are compiled per platform; resolve the library
+# extension once at import time.
+ext_F = {'Windows': '.dll', 'Darwin': '.dylib', 'Linux': '.so'}[
+    platform.system()]
+
+def tileBound(x, K):
+    # Tile a one-row bound DataFrame over K mesh or collocation points in
+    # the column-major layout that ca.vec(x.to_numpy().T * np.ones((1, K)))
+    # produced, without materializing the tile or round-tripping through
+    # CasADi.
+    return np.tile(x.to_numpy().reshape(-1), K).reshape(-1, 1)
+
+# Cache of loaded external functions keyed by library path. Multiple cases
+# typically share the same model and contact configuration, so the compiled
+# library only needs to be loaded once per sweep.
+loadedExternalFunctions = {}
+def loadExternalFunction(pathLib):
+    if pathLib not in loadedExternalFunctions:
+        loadedExternalFunctions[pathLib] = ca.external('F', pathLib)
+    return loadedExternalFunctions[pathLib]
+
+# The optimal-trajectory aggregate is written in the background so the next
+# case's solve overlaps the disk write. The single worker serializes the
+# writes; any pending write is awaited before the file is read back.
+from concurrent.futures import ThreadPoolExecutor
+trajectorySavePool = ThreadPoolExecutor(max_workers=1)
+pendingTrajectorySave = None
+
 # High-level settings.
 # This script includes both code for solving the problem and for processing the
 # results. Yet if you solved the optimal control problem and saved the results,
@@ -191,7 +218,7 @@ for case in cases:
     sideMtParameters = getMTParameters(pathModel, rightSideMuscles,
                                        loadMTParameters, modelName,
                                        pathModelFolder)
-    mtParameters = np.concatenate((sideMtParameters, sideMtParameters), axis=1)
+    mtParameters = np.tile(sideMtParameters, 2)
     
     # Tendon stiffness.
     from muscleData import tendonStiffness
@@ -206,14 +233,12 @@ for case in cases:
             for muscleAchillesTendon in musclesAchillesTendon]
         sideTendonStiffness[0, idxMusclesAchillesTendon] = (
             AchillesTendonStiffness)                
-    tendonStiffness = np.concatenate((sideTendonStiffness,
-                                      sideTendonStiffness), axis=1)
+    tendonStiffness = np.tile(sideTendonStiffness, 2)
     
     # Muscle specific tension.
     from muscleData import specificTension
     sideSpecificTension = specificTension(rightSideMuscles)
-    specificTension = np.concatenate((sideSpecificTension, 
-                                      sideSpecificTension), axis=1)
+    specificTension = np.tile(sideSpecificTension, 2)
     
     # Hill-equilibrium. We use as muscle model the DeGrooteFregly2016 model
     # introduced in: https://pubmed.ncbi.nlm.nih.gov/27001399/.
@@ -253,15 +278,12 @@ for case in cases:
     nMtpJoints = len(mtpJoints)
     
     if not withMTP:
-        for joint in mtpJoints:
-            joints.remove(joint)
+        joints = [joint for joint in joints if joint not in mtpJoints]
     nJoints = len(joints)
     
     # Rotational joints.
-    rotationalJoints = copy.deepcopy(joints)
-    rotationalJoints.remove('pelvis_tx')
-    rotationalJoints.remove('pelvis_ty')
-    rotationalJoints.remove('pelvis_tz')
+    rotationalJoints = [joint for joint in joints if joint not in
+                        ['pelvis_tx', 'pelvis_ty', 'pelvis_tz']]
     from utilities import getJointIndices
     idxRotJoints = getJointIndices(joints, rotationalJoints)
     
@@ -282,8 +304,8 @@ for case in cases:
         'arm_flex_r', 'arm_add_r', 'arm_rot_r', 
         'elbow_flex_l', 'elbow_flex_r']
     if not withMTP:
-        for joint in mtpJoints:
-            periodicQsJointsA.remove(joint)
+        periodicQsJointsA = [joint for joint in periodicQsJointsA 
+                             if joint not in mtpJoints]
     idxPerQsJointsA = getJointIndices(joints, periodicQsJointsA)
     periodicQsJointsB = [
         'pelvis_tilt', 'pelvis_ty', 
@@ -298,8 +320,8 @@ for case in cases:
         'arm_flex_l', 'arm_add_l', 'arm_rot_l', 
         'elbow_flex_r', 'elbow_flex_l']
     if not withMTP:
-        for joint in mtpJoints:
-            periodicQsJointsB.remove(joint)
+        periodicQsJointsB = [joint for joint in periodicQsJointsB 
+                             if joint not in mtpJoints]
     idxPerQsJointsB = getJointIndices(joints, periodicQsJointsB)
     
     # The joint velocities in periodicQdsJointsA after half a gait cycle
@@ -319,8 +341,8 @@ for case in cases:
         'arm_flex_r', 'arm_add_r', 'arm_rot_r', 
         'elbow_flex_l', 'elbow_flex_r']
     if not withMTP:
-        for joint in mtpJoints:
-            periodicQdsJointsA.remove(joint)
+        periodicQdsJointsA = [joint for joint in periodicQdsJointsA 
+                              if joint not in mtpJoints]
     idxPerQdsJointsA = getJointIndices(joints, periodicQdsJointsA)
     periodicQdsJointsB = [
         'pelvis_tilt', 'pelvis_tx', 'pelvis_ty', 
@@ -335,8 +357,8 @@ for case in cases:
         'arm_flex_l', 'arm_add_l', 'arm_rot_l', 
         'elbow_flex_r', 'elbow_flex_l']
     if not withMTP:
-        for joint in mtpJoints:
-            periodicQdsJointsB.remove(joint)
+        periodicQdsJointsB = [joint for joint in periodicQdsJointsB 
+                              if joint not in mtpJoints]
     idxPerQdsJointsB = getJointIndices(joints, periodicQdsJointsB)
     
     # The joint positions and velocities in periodicOppositeJoints after half
@@ -359,9 +381,7 @@ for case in cases:
     idxPerArmJoints = getJointIndices(armJoints, periodicArmJoints)
     
     # All but arm joints.
-    noArmJoints = copy.deepcopy(joints)
-    for joint in armJoints:
-        noArmJoints.remove(joint)
+    noArmJoints = [joint for joint in joints if joint not in armJoints]
     nNoArmJoints = len(noArmJoints)
     idxNoArmJoints = getJointIndices(joints, noArmJoints)
     
@@ -369,6 +389,9 @@ for case in cases:
     groundPelvisJoints = ['pelvis_tilt', 'pelvis_list', 'pelvis_rotation',
                           'pelvis_tx', 'pelvis_ty', 'pelvis_tz']
     idxGroundPelvisJoints = getJointIndices(joints, groundPelvisJoints)
+    # The forward-translation coordinate is singled out in many places
+    # (distance traveled, gait-cycle reconstruction), so resolve it once.
+    idxPelvisTx = joints.index('pelvis_tx')
     
     # Joints with passive torques.
     # We here hard code the list to replicate previous results. 
@@ -381,9 +404,10 @@ for case in cases:
         'lumbar_extension', 'lumbar_bending', 'lumbar_rotation',
         'mtp_angle_l', 'mtp_angle_r']
     if not withMTP:
-        for joint in mtpJoints:
-            passiveTorqueJoints.remove(joint)
+        passiveTorqueJoints = [joint for joint in passiveTorqueJoints 
+                               if joint not in mtpJoints]
     nPassiveTorqueJoints = len(passiveTorqueJoints)
+    idxPassiveTorqueJoints = getJointIndices(joints, passiveTorqueJoints)
    
     # Trunk joints.
     trunkJoints = ['lumbar_extension', 'lumbar_bending', 'lumbar_rotation']
@@ -399,7 +423,16 @@ for case in cases:
         'ankle_angle_l', 'ankle_angle_r', 
         'subtalar_angle_l', 'subtalar_angle_r',
         'lumbar_extension', 'lumbar_bending', 'lumbar_rotation']
-    
+    idxMuscleDrivenJoints = getJointIndices(joints, muscleDrivenJoints)
+    # Every muscle-driven joint also has a passive torque; this locates each
+    # one in the passive-torque vector.
+    idxMuscleDrivenJointsInPassive = getJointIndices(passiveTorqueJoints,
+                                                     muscleDrivenJoints)
+    if withMTP:
+        idxMtpJoints = getJointIndices(joints, mtpJoints)
+        idxMtpJointsInPassive = getJointIndices(passiveTorqueJoints,
+                                                mtpJoints)
+
     # %% Polynomial approximations.
     # Muscle-tendon lengths, velocities, and moment arms are estimated based
     # on polynomial approximations of joint positions and velocities. The
@@ -416,9 +449,22 @@ for case in cases:
         'ankle_angle_r', 'subtalar_angle_r', 'mtp_angle_r',
         'lumbar_extension', 'lumbar_bending', 'lumbar_rotation']
     if not withMTP:
-        leftPolynomialJoints.remove(mtpJoints[0])
-        rightPolynomialJoints.remove(mtpJoints[1])
+        leftPolynomialJoints = [joint for joint in leftPolynomialJoints 
+                                if joint not in mtpJoints]
+        rightPolynomialJoints = [joint for joint in rightPolynomialJoints 
+                                 if joint not in mtpJoints]
     nPolynomialJoints = len(leftPolynomialJoints)
+    # Joints whose moment arms are taken from the polynomial approximations;
+    # the mtp joints are not muscle-driven and the lumbar (trunk) moment arms
+    # are handled separately.
+    leftMomentArmJoints = [
+        joint for joint in leftPolynomialJoints
+        if joint not in ['mtp_angle_l', 'lumbar_extension', 'lumbar_bending',
+                         'lumbar_rotation']]
+    rightMomentArmJoints = [
+        joint for joint in rightPolynomialJoints
+        if joint not in ['mtp_angle_r', 'lumbar_extension', 'lumbar_bending',
+                         'lumbar_rotation']]
     
     from muscleData import getPolynomialData      
     pathCoordinates = os.path.join(pathOpenSimModel, 'templates', 'MA', 
@@ -488,76 +534,85 @@ for case in cases:
     # outputs might slightly impact the optimal control problem, since the
     # external function is used for instance when computing the constraint
     # Jacobian; the number of inputs and outputs therefore matters.
-    if platform.system() == 'Windows':
-        ext_F = '.dll'
-    elif platform.system() == 'Darwin':
-        ext_F = '.dylib'
-    else:
-        raise ValueError("Platform not supported.")
-    
     suff_F = ''
     if contactConfiguration == 'generic_low':
         suff_F = '_' + contactConfiguration
     
-    F = ca.external('F', os.path.join(
-        pathExternalFunction, modelName + suff_F + ext_F))
+    # F is only evaluated while formulating the problem, F1 only while
+    # post-processing; skip loading whichever is not needed.
+    if solveProblem:
+        F = loadExternalFunction(os.path.join(
+            pathExternalFunction, modelName + suff_F + ext_F))
     if analyzeResults:
-        F1 = ca.external('F', os.path.join(
+        F1 = loadExternalFunction(os.path.join(
             pathExternalFunction, modelName + suff_F + '_pp' + ext_F))
     
     # The external function F outputs joint torques, as well as the 2D
     # coordinates of some body origins. The order matters. The joint torques
     # are returned in the order of the list joints above. The indices of the 
-    # 2D coordinates of the body origins are then hard-coded as follows.
+    # 2D coordinates of the body origins are laid out contiguously after the
+    # torques and are derived by walking a running cursor, which is less
+    # error-prone than chaining [-1]+1 when outputs get added or removed.
+    def nextIdx(n):
+        idx = list(range(nextIdx.cursor, nextIdx.cursor + n))
+        nextIdx.cursor += n
+        return idx
+    nextIdx.cursor = nJoints
     # Origins calcaneus (2D).
-    idxCalcOr_r = list(range(nJoints, nJoints+2))
-    idxCalcOr_l = list(range(idxCalcOr_r[-1]+1, idxCalcOr_r[-1]+3))
+    idxCalcOr_r = nextIdx(2)
+    idxCalcOr_l = nextIdx(2)
     # Origins femurs (2D).
-    idxFemurOr_r = list(range(idxCalcOr_l[-1]+1, idxCalcOr_l[-1]+3))
-    idxFemurOr_l = list(range(idxFemurOr_r[-1]+1, idxFemurOr_r[-1]+3))
+    idxFemurOr_r = nextIdx(2)
+    idxFemurOr_l = nextIdx(2)
     # Origins hands (2D).
-    idxHandOr_r = list(range(idxFemurOr_l[-1]+1, idxFemurOr_l[-1]+3))
-    idxHandOr_l = list(range(idxHandOr_r[-1]+1, idxHandOr_r[-1]+3))
+    idxHandOr_r = nextIdx(2)
+    idxHandOr_l = nextIdx(2)
     # Origins tibias (2D).
-    idxTibiaOr_r = list(range(idxHandOr_l[-1]+1, idxHandOr_l[-1]+3))
-    idxTibiaOr_l = list(range(idxTibiaOr_r[-1]+1, idxTibiaOr_r[-1]+3))
+    idxTibiaOr_r = nextIdx(2)
+    idxTibiaOr_l = nextIdx(2)
     # Origins toes (2D).
-    idxToesOr_r = list(range(idxTibiaOr_l[-1]+1, idxTibiaOr_l[-1]+3))
-    idxToesOr_l = list(range(idxToesOr_r[-1]+1, idxToesOr_r[-1]+3))
+    idxToesOr_r = nextIdx(2)
+    idxToesOr_l = nextIdx(2)
+    # Stacked index pairs for the collision constraints; the squared
+    # distances between the paired origins are bounded in the problem
+    # formulation and can then be computed from one stacked difference.
+    idxCollisionA = (idxCalcOr_r + idxFemurOr_r + idxFemurOr_l +
+                     idxTibiaOr_r + idxToesOr_r)
+    idxCollisionB = (idxCalcOr_l + idxHandOr_r + idxHandOr_l +
+                     idxTibiaOr_l + idxToesOr_l)
     
     # The external function F1 outputs joint torques, ground reaction forces,
     # 3D coordinates of the origin of both calcaneus, and ground reaction
     # moments. The order matters. The joint torques are returned in the order
-    # of the list joints above. The indices of the remaining outputs are then
-    # hard-coded as follows.
+    # of the list joints above; the remaining outputs follow contiguously.
+    nextIdx.cursor = nJoints
     # Ground reaction forces (GRFs).
-    idxGRF_r = list(range(nJoints, nJoints+3))
-    idxGRF_l = list(range(idxGRF_r[-1]+1, idxGRF_r[-1]+4))
+    idxGRF_r = nextIdx(3)
+    idxGRF_l = nextIdx(3)
     idxGRF = idxGRF_r + idxGRF_l
     NGRF = len(idxGRF)
     # Origins calcaneus (3D).
-    idxCalcOr3D_r = list(range(idxGRF_l[-1]+1, idxGRF_l[-1]+4))
-    idxCalcOr3D_l = list(range(idxCalcOr3D_r[-1]+1, idxCalcOr3D_r[-1]+4))
+    idxCalcOr3D_r = nextIdx(3)
+    idxCalcOr3D_l = nextIdx(3)
     idxCalcOr3D = idxCalcOr3D_r + idxCalcOr3D_l
     NCalcOr3D = len(idxCalcOr3D)
     # Ground reaction moments (GRMs).
-    idxGRM_r = list(range(idxCalcOr3D_l[-1]+1, idxCalcOr3D_l[-1]+4))
-    idxGRM_l = list(range(idxGRM_r[-1]+1, idxGRM_r[-1]+4))
+    idxGRM_r = nextIdx(3)
+    idxGRM_l = nextIdx(3)
     idxGRM = idxGRM_r + idxGRM_l
     NGRM = len(idxGRM)
     # Number of outputs of F1.
-    NF1_out = idxGRM_l[-1] + 1
+    NF1_out = nextIdx.cursor
     
     # %% Metabolic energy model. 
     maximalIsometricForce = mtParameters[0, :]
     optimalFiberLength = mtParameters[1, :]
-    muscleVolume = np.multiply(maximalIsometricForce, optimalFiberLength)
-    muscleMass = np.divide(np.multiply(muscleVolume, 1059.7), 
-                           np.multiply(specificTension[0, :].T, 1e6))
+    muscleVolume = maximalIsometricForce * optimalFiberLength
+    # Muscle density 1059.7 kg/m^3; specific tension expressed in N/m^2.
+    muscleMass = muscleVolume * (1059.7 / 1e6) / specificTension[0, :]
     from muscleData import slowTwitchRatio
     sideSlowTwitchRatio = slowTwitchRatio(rightSideMuscles)
-    slowTwitchRatio = (np.concatenate((sideSlowTwitchRatio, 
-                                      sideSlowTwitchRatio), axis=1))[0, :].T
+    slowTwitchRatio = np.tile(sideSlowTwitchRatio, 2)[0, :]
     smoothingConstant = 10
     from casadiFunctions import metabolicsBhargava
     f_metabolicsBhargava = metabolicsBhargava(
@@ -568,14 +623,17 @@ for case in cases:
     f_armActivationDynamics = armActivationDynamics(nArmJoints)
     
     # %% Passive joint torques.
-    from casadiFunctions import getLimitTorques
+    # The per-joint parameters are stacked so that one vectorized CasADi
+    # function returns the torques of all passive joints at once.
+    from casadiFunctions import getLimitTorquesAll
     from muscleData import passiveTorqueData
     damping = 0.1
-    f_passiveTorque = {}
-    for joint in passiveTorqueJoints:
-        f_passiveTorque[joint] = getLimitTorques(
-            passiveTorqueData(joint)[0],
-            passiveTorqueData(joint)[1], damping)
+    kPassiveTorques = np.array(
+        [passiveTorqueData(joint)[0] for joint in passiveTorqueJoints])
+    thetaPassiveTorques = np.array(
+        [passiveTorqueData(joint)[1] for joint in passiveTorqueJoints])
+    f_passiveTorque = getLimitTorquesAll(kPassiveTorques,
+                                         thetaPassiveTorques, damping)
     
     from casadiFunctions import getLinearPassiveTorques
     stiffnessArm = 0
@@ -603,8 +661,12 @@ for case in cases:
     nametrial_walk_IK = 'IK_' + nametrial_walk_id
     pathIK_walk = os.path.join(pathOpenSimModel, 'templates', 'IK', 
                                nametrial_walk_IK + '.mot')
-    from utilities import getIK
-    Qs_walk_filt = getIK(pathIK_walk, joints)[1]
+    # The parsing and filtering of the template motion is cached in memory,
+    # keyed on the file path and the joint list, so cases sharing a model
+    # folder but differing in joint set (e.g. with/without MTP) each get the
+    # right columns.
+    from utilities import getIKCached
+    Qs_walk_filt = getIKCached(pathIK_walk, joints)[1]
     
     from bounds import bounds
     bounds = bounds(Qs_walk_filt, joints, rightSideMuscles, armJoints, 
@@ -615,56 +677,56 @@ for case in cases:
     
     # States.
     ubA, lbA, scalingA = bounds.getBoundsActivation()
-    ubAk = ca.vec(ubA.to_numpy().T * np.ones((1, N+1))).full()
-    lbAk = ca.vec(lbA.to_numpy().T * np.ones((1, N+1))).full()
-    ubAj = ca.vec(ubA.to_numpy().T * np.ones((1, d*N))).full()
-    lbAj = ca.vec(lbA.to_numpy().T * np.ones((1, d*N))).full()
+    ubAk = tileBound(ubA, N+1)
+    lbAk = tileBound(lbA, N+1)
+    ubAj = tileBound(ubA, d*N)
+    lbAj = tileBound(lbA, d*N)
     
     ubF, lbF, scalingF = bounds.getBoundsForce()
-    ubFk = ca.vec(ubF.to_numpy().T * np.ones((1, N+1))).full()
-    lbFk = ca.vec(lbF.to_numpy().T * np.ones((1, N+1))).full()
-    ubFj = ca.vec(ubF.to_numpy().T * np.ones((1, d*N))).full()
-    lbFj = ca.vec(lbF.to_numpy().T * np.ones((1, d*N))).full()
+    ubFk = tileBound(ubF, N+1)
+    lbFk = tileBound(lbF, N+1)
+    ubFj = tileBound(ubF, d*N)
+    lbFj = tileBound(lbF, d*N)
         
     ubQs, lbQs, scalingQs, ubQs0, lbQs0 = bounds.getBoundsPosition()
-    ubQsk = ca.vec(ubQs.to_numpy().T * np.ones((1, N+1))).full()
-    lbQsk = ca.vec(lbQs.to_numpy().T * np.ones((1, N+1))).full()
-    ubQsj = ca.vec(ubQs.to_numpy().T * np.ones((1, d*N))).full()
-    lbQsj = ca.vec(lbQs.to_numpy().T * np.ones((1, d*N))).full()
+    ubQsk = tileBound(ubQs, N+1)
+    lbQsk = tileBound(lbQs, N+1)
+    ubQsj = tileBound(ubQs, d*N)
+    lbQsj = tileBound(lbQs, d*N)
     # We want to further constraint the pelvis_tx position at the first mesh
     # point, such that the model starts walking with pelvis_tx=0.
-    lbQsk[joints.index('pelvis_tx')] = lbQs0['pelvis_tx'].to_numpy()
-    ubQsk[joints.index('pelvis_tx')] = ubQs0['pelvis_tx'].to_numpy()
+    lbQsk[idxPelvisTx] = lbQs0['pelvis_tx'].to_numpy()
+    ubQsk[idxPelvisTx] = ubQs0['pelvis_tx'].to_numpy()
     
     ubQds, lbQds, scalingQds = bounds.getBoundsVelocity()
-    ubQdsk = ca.vec(ubQds.to_numpy().T * np.ones((1, N+1))).full()
-    lbQdsk = ca.vec(lbQds.to_numpy().T * np.ones((1, N+1))).full()
-    ubQdsj = ca.vec(ubQds.to_numpy().T * np.ones((1, d*N))).full()
-    lbQdsj = ca.vec(lbQds.to_numpy().T * np.ones((1, d*N))).full()
+    ubQdsk = tileBound(ubQds, N+1)
+    lbQdsk = tileBound(lbQds, N+1)
+    ubQdsj = tileBound(ubQds, d*N)
+    lbQdsj = tileBound(lbQds, d*N)
     
     ubArmA, lbArmA, scalingArmA = bounds.getBoundsArmActivation()
-    ubArmAk = ca.vec(ubArmA.to_numpy().T * np.ones((1, N+1))).full()
-    lbArmAk = ca.vec(lbArmA.to_numpy().T * np.ones((1, N+1))).full()
-    ubArmAj = ca.vec(ubArmA.to_numpy().T * np.ones((1, d*N))).full()
-    lbArmAj = ca.vec(lbArmA.to_numpy().T * np.ones((1, d*N))).full()
+    ubArmAk = tileBound(ubArmA, N+1)
+    lbArmAk = tileBound(lbArmA, N+1)
+    ubArmAj = tileBound(ubArmA, d*N)
+    lbArmAj = tileBound(lbArmA, d*N)
     
     # Controls.
     ubADt, lbADt, scalingADt = bounds.getBoundsActivationDerivative()
-    ubADtk = ca.vec(ubADt.to_numpy().T * np.ones((1, N))).full()
-    lbADtk = ca.vec(lbADt.to_numpy().T * np.ones((1, N))).full()
+    ubADtk = tileBound(ubADt, N)
+    lbADtk = tileBound(lbADt, N)
     
     ubArmE, lbArmE, scalingArmE = bounds.getBoundsArmExcitation()
-    ubArmEk = ca.vec(ubArmE.to_numpy().T * np.ones((1, N))).full()
-    lbArmEk = ca.vec(lbArmE.to_numpy().T * np.ones((1, N))).full()
+    ubArmEk = tileBound(ubArmE, N)
+    lbArmEk = tileBound(lbArmE, N)
     
     # Slack controls.
     ubQdds, lbQdds, scalingQdds = bounds.getBoundsAcceleration()
-    ubQddsj = ca.vec(ubQdds.to_numpy().T * np.ones((1, d*N))).full()
-    lbQddsj = ca.vec(lbQdds.to_numpy().T * np.ones((1, d*N))).full()
+    ubQddsj = tileBound(ubQdds, d*N)
+    lbQddsj = tileBound(lbQdds, d*N)
     
     ubFDt, lbFDt, scalingFDt = bounds.getBoundsForceDerivative()
-    ubFDtj = ca.vec(ubFDt.to_numpy().T * np.ones((1, d*N))).full()
-    lbFDtj = ca.vec(lbFDt.to_numpy().T * np.ones((1, d*N))).full()
+    ubFDtj = tileBound(ubFDt, d*N)
+    lbFDtj = tileBound(lbFDt, d*N)
     
     # Other.
     _, _, scalingMtpE = bounds.getBoundsMtpExcitation()
@@ -730,84 +792,94 @@ for case in cases:
         # Muscle activation at mesh points.
         a = opti.variable(nMuscles, N+1)
         opti.subject_to(opti.bounded(lbAk, ca.vec(a), ubAk))
-        opti.set_initial(a, gA.to_numpy().T)
-        assert np.all(lbAk <= ca.vec(gA.to_numpy().T).full()), (
+        gA_np = gA.to_numpy()
+        opti.set_initial(a, gA_np.T)
+        assert np.all(lbAk <= gA_np.reshape(-1, 1)), (
             "Error lower bound muscle activation")
-        assert np.all(ubAk >= ca.vec(gA.to_numpy().T).full()), (
+        assert np.all(ubAk >= gA_np.reshape(-1, 1)), (
             "Error upper bound muscle activation")
         # Muscle activation at collocation points.
         a_col = opti.variable(nMuscles, d*N)
         opti.subject_to(opti.bounded(lbAj, ca.vec(a_col), ubAj))
-        opti.set_initial(a_col, gACol.to_numpy().T)
-        assert np.all(lbAj <= ca.vec(gACol.to_numpy().T).full()), (
+        gACol_np = gACol.to_numpy()
+        opti.set_initial(a_col, gACol_np.T)
+        assert np.all(lbAj <= gACol_np.reshape(-1, 1)), (
             "Error lower bound muscle activation collocation points")
-        assert np.all(ubAj >= ca.vec(gACol.to_numpy().T).full()), (
+        assert np.all(ubAj >= gACol_np.reshape(-1, 1)), (
             "Error upper bound muscle activation collocation points")
         # Tendon force at mesh points.
         normF = opti.variable(nMuscles, N+1)
         opti.subject_to(opti.bounded(lbFk, ca.vec(normF), ubFk))
-        opti.set_initial(normF, gF.to_numpy().T)
-        assert np.all(lbFk <= ca.vec(gF.to_numpy().T).full()), (
+        gF_np = gF.to_numpy()
+        opti.set_initial(normF, gF_np.T)
+        assert np.all(lbFk <= gF_np.reshape(-1, 1)), (
             "Error lower bound muscle force")
-        assert np.all(ubFk >= ca.vec(gF.to_numpy().T).full()), (
+        assert np.all(ubFk >= gF_np.reshape(-1, 1)), (
             "Error upper bound muscle force")
         # Tendon force at collocation points.
         normF_col = opti.variable(nMuscles, d*N)
         opti.subject_to(opti.bounded(lbFj, ca.vec(normF_col), ubFj))
-        opti.set_initial(normF_col, gFCol.to_numpy().T)
-        assert np.all(lbFj <= ca.vec(gFCol.to_numpy().T).full()), (
+        gFCol_np = gFCol.to_numpy()
+        opti.set_initial(normF_col, gFCol_np.T)
+        assert np.all(lbFj <= gFCol_np.reshape(-1, 1)), (
             "Error lower bound muscle force collocation points")
-        assert np.all(ubFj >= ca.vec(gFCol.to_numpy().T).full()), (
+        assert np.all(ubFj >= gFCol_np.reshape(-1, 1)), (
             "Error upper bound muscle force collocation points")
         # Joint position at mesh points.
         Qs = opti.variable(nJoints, N+1)
         opti.subject_to(opti.bounded(lbQsk, ca.vec(Qs), ubQsk))
-        opti.set_initial(Qs, gQs.to_numpy().T)
+        gQs_np = gQs.to_numpy()
+        opti.set_initial(Qs, gQs_np.T)
         if not guessType == 'coldStart':
-            assert np.all(lbQsk <= ca.vec(gQs.to_numpy().T).full()), (
+            assert np.all(lbQsk <= gQs_np.reshape(-1, 1)), (
                 "Error lower bound joint position")
-            assert np.all(ubQsk >= ca.vec(gQs.to_numpy().T).full()), (
+            assert np.all(ubQsk >= gQs_np.reshape(-1, 1)), (
                 "Error upper bound joint position")
         # Joint position at collocation points.
         Qs_col = opti.variable(nJoints, d*N)
         opti.subject_to(opti.bounded(lbQsj, ca.vec(Qs_col), ubQsj))
-        opti.set_initial(Qs_col, gQsCol.to_numpy().T)
+        gQsCol_np = gQsCol.to_numpy()
+        opti.set_initial(Qs_col, gQsCol_np.T)
         if not guessType == 'coldStart':
-            assert np.all(lbQsj <= ca.vec(gQsCol.to_numpy().T).full()), (
+            assert np.all(lbQsj <= gQsCol_np.reshape(-1, 1)), (
                 "Error lower bound joint position collocation points")
-            assert np.all(ubQsj >= ca.vec(gQsCol.to_numpy().T).full()), (
+            assert np.all(ubQsj >= gQsCol_np.reshape(-1, 1)), (
                 "Error upper bound joint position collocation points")
         # Joint velocity at mesh points.
         Qds = opti.variable(nJoints, N+1)
         opti.subject_to(opti.bounded(lbQdsk, ca.vec(Qds), ubQdsk))
-        opti.set_initial(Qds, gQds.to_numpy().T)
-        assert np.all(lbQdsk <= ca.vec(gQds.to_numpy().T).full()), (
+        gQds_np = gQds.to_numpy()
+        opti.set_initial(Qds, gQds_np.T)
+        assert np.all(lbQdsk <= gQds_np.reshape(-1, 1)), (
             "Error lower bound joint velocity")
-        assert np.all(ubQdsk >= ca.vec(gQds.to_numpy().T).full()), (
+        assert np.all(ubQdsk >= gQds_np.reshape(-1, 1)), (
             "Error upper bound joint velocity")
         # Joint velocity at collocation points.
         Qds_col = opti.variable(nJoints, d*N)
         opti.subject_to(opti.bounded(lbQdsj, ca.vec(Qds_col), ubQdsj))
-        opti.set_initial(Qds_col, gQdsCol.to_numpy().T)
-        assert np.all(lbQdsj <= ca.vec(gQdsCol.to_numpy().T).full()), (
+        gQdsCol_np = gQdsCol.to_numpy()
+        opti.set_initial(Qds_col, gQdsCol_np.T)
+        assert np.all(lbQdsj <= gQdsCol_np.reshape(-1, 1)), (
             "Error lower bound joint velocity collocation points")
-        assert np.all(ubQdsj >= ca.vec(gQdsCol.to_numpy().T).full()), (
+        assert np.all(ubQdsj >= gQdsCol_np.reshape(-1, 1)), (
             "Error upper bound joint velocity collocation points")
         # Arm activation at mesh points.
         aArm = opti.variable(nArmJoints, N+1)
         opti.subject_to(opti.bounded(lbArmAk, ca.vec(aArm), ubArmAk))
-        opti.set_initial(aArm, gArmA.to_numpy().T)
-        assert np.all(lbArmAk <= ca.vec(gArmA.to_numpy().T).full()), (
+        gArmA_np = gArmA.to_numpy()
+        opti.set_initial(aArm, gArmA_np.T)
+        assert np.all(lbArmAk <= gArmA_np.reshape(-1, 1)), (
             "Error lower bound arm activation")
-        assert np.all(ubArmAk >= ca.vec(gArmA.to_numpy().T).full()), (
+        assert np.all(ubArmAk >= gArmA_np.reshape(-1, 1)), (
             "Error upper bound arm activation")
         # Arm activation at collocation points.
         aArm_col = opti.variable(nArmJoints, d*N)
         opti.subject_to(opti.bounded(lbArmAj, ca.vec(aArm_col), ubArmAj))
-        opti.set_initial(aArm_col, gArmACol.to_numpy().T)
-        assert np.all(lbArmAj <= ca.vec(gArmACol.to_numpy().T).full()), (
+        gArmACol_np = gArmACol.to_numpy()
+        opti.set_initial(aArm_col, gArmACol_np.T)
+        assert np.all(lbArmAj <= gArmACol_np.reshape(-1, 1)), (
             "Error lower bound arm activation collocation points")
-        assert np.all(ubArmAj >= ca.vec(gArmACol.to_numpy().T).full()), (
+        assert np.all(ubArmAj >= gArmACol_np.reshape(-1, 1)), (
             "Error upper bound arm activation collocation points")
         
         #######################################################################
@@ -815,18 +887,20 @@ for case in cases:
         # Muscle activation derivative at mesh points.
         aDt = opti.variable(nMuscles, N)
         opti.subject_to(opti.bounded(lbADtk, ca.vec(aDt), ubADtk))
-        opti.set_initial(aDt, gADt.to_numpy().T)
-        assert np.all(lbADtk <= ca.vec(gADt.to_numpy().T).full()), (
+        gADt_np = gADt.to_numpy()
+        opti.set_initial(aDt, gADt_np.T)
+        assert np.all(lbADtk <= gADt_np.reshape(-1, 1)), (
             "Error lower bound muscle activation derivative")
-        assert np.all(ubADtk >= ca.vec(gADt.to_numpy().T).full()), (
+        assert np.all(ubADtk >= gADt_np.reshape(-1, 1)), (
             "Error upper bound muscle activation derivative")
         # Arm excitation at mesh points.
         eArm = opti.variable(nArmJoints, N)
         opti.subject_to(opti.bounded(lbArmEk, ca.vec(eArm), ubArmEk))
-        opti.set_initial(eArm, gArmE.to_numpy().T)
-        assert np.all(lbArmEk <= ca.vec(gArmE.to_numpy().T).full()), (
+        gArmE_np = gArmE.to_numpy()
+        opti.set_initial(eArm, gArmE_np.T)
+        assert np.all(lbArmEk <= gArmE_np.reshape(-1, 1)), (
             "Error lower bound arm excitation")
-        assert np.all(ubArmEk >= ca.vec(gArmE.to_numpy().T).full()), (
+        assert np.all(ubArmEk >= gArmE_np.reshape(-1, 1)), (
             "Error upper bound arm excitation")
         
         #######################################################################
@@ -834,19 +908,21 @@ for case in cases:
         # Tendon force derivative at collocation points.
         normFDt_col = opti.variable(nMuscles, d*N)
         opti.subject_to(opti.bounded(lbFDtj, ca.vec(normFDt_col), ubFDtj))
-        opti.set_initial(normFDt_col, gFDtCol.to_numpy().T)
-        assert np.all(lbFDtj <= ca.vec(gFDtCol.to_numpy().T).full()), (
+        gFDtCol_np = gFDtCol.to_numpy()
+        opti.set_initial(normFDt_col, gFDtCol_np.T)
+        assert np.all(lbFDtj <= gFDtCol_np.reshape(-1, 1)), (
             "Error lower bound muscle force derivative")
-        assert np.all(ubFDtj >= ca.vec(gFDtCol.to_numpy().T).full()), (
+        assert np.all(ubFDtj >= gFDtCol_np.reshape(-1, 1)), (
             "Error upper bound muscle force derivative")
         # Joint velocity derivative (acceleration) at collocation points.
         Qdds_col = opti.variable(nJoints, d*N)
         opti.subject_to(opti.bounded(lbQddsj, ca.vec(Qdds_col),
                                      ubQddsj))
-        opti.set_initial(Qdds_col, gQddsCol.to_numpy().T)
-        assert np.all(lbQddsj <= ca.vec(gQddsCol.to_numpy().T).full()), (
+        gQddsCol_np = gQddsCol.to_numpy()
+        opti.set_initial(Qdds_col, gQddsCol_np.T)
+        assert np.all(lbQddsj <= gQddsCol_np.reshape(-1, 1)), (
             "Error lower bound joint velocity derivative")
-        assert np.all(ubQddsj >= ca.vec(gQddsCol.to_numpy().T).full()), (
+        assert np.all(ubQddsj >= gQddsCol_np.reshape(-1, 1)), (
             "Error upper bound joint velocity derivative")
             
         ####################################################################### 
@@ -884,142 +960,159 @@ for case in cases:
         # Collocation matrices.
         tau = ca.collocation_points(d,'radau');
         [C,D] = ca.collocation_interpolators(tau);
+        # collocation_interpolators returns Python lists; convert the
+        # interpolation coefficients to DM once so ca.mtimes does not
+        # rebuild them at every use. D stays a list: its entries are used
+        # as scalar coefficients in the continuity constraints.
+        C = [ca.DM(c) for c in C]
         # Missing matrix B, add manually.
         B = [-8.88178419700125e-16, 0.376403062700467, 0.512485826188421, 
              0.111111111111111]
         
         #######################################################################
         # Initialize cost function and constraint vectors.
+        # The cost-term weights are constant; assembling them in one vector
+        # lets each collocation point contribute a single weighted sum
+        # scaled by its quadrature weight.
+        costWeights = ca.DM([
+            weights['metabolicEnergyRateTerm'], weights['activationTerm'],
+            weights['armExcitationTerm'], weights['jointAccelerationTerm'],
+            weights['passiveTorqueTerm'], weights['controls'],
+            weights['controls'], weights['controls']])
         J = 0
         eq_constr = []
         ineq_constr1 = []
         ineq_constr2 = []
         ineq_constr3 = []
         ineq_constr4 = []
-        ineq_constr5 = [] 
-        ineq_constr6 = [] 
-            
+        ineq_constr5 = []
+        ineq_constr6 = []
+
+        #######################################################################
+        # Unscale variables. The scaling factors are converted to plain
+        # NumPy column vectors once; CasADi broadcasts them across the
+        # collocation columns, so none of this depends on j and it stays
+        # outside the loop below.
+        scF = scalingF.to_numpy().reshape(-1, 1)
+        scQs = scalingQs.to_numpy().reshape(-1, 1)
+        scQds = scalingQds.to_numpy().reshape(-1, 1)
+        scFDt = scalingFDt.to_numpy().reshape(-1, 1)
+        scQdds = scalingQdds.to_numpy().reshape(-1, 1)
+        scADt = scalingADt.to_numpy().reshape(-1, 1)
+        scArmE = scalingArmE.iloc[0][armJoints].to_numpy().reshape(-1, 1)
+        scMtpE = scalingMtpE.iloc[0][mtpJoints].to_numpy().reshape(-1, 1)
+        # States.
+        normFkj_nsc = normFkj * scF
+        Qskj_nsc = Qskj * scQs
+        Qdskj_nsc = Qdskj * scQds
+        # Controls.
+        aDtk_nsc = aDtk * scADt
+        # Slack controls.
+        normFDtj_nsc = normFDtj * scFDt
+        Qddsj_nsc = Qddsj * scQdds
+        # Qs and Qds are intertwined in the external function.
+        QsQdskj_nsc = ca.MX(nJoints*2, d+1)
+        QsQdskj_nsc[::2, :] = Qskj_nsc
+        QsQdskj_nsc[1::2, :] = Qdskj_nsc
+
+        #######################################################################
+        # The muscle-level functions are mapped over the d collocation points
+        # and called once, so the expression graph contains one map node per
+        # function rather than d separate calls. The maps are serial on
+        # purpose: the mesh-level map further down already spreads the
+        # evaluation across threads.
+        # Polynomial approximations.
+        # f_polynomial takes its joint coordinates as a row vector, so the
+        # per-point columns are laid side by side for the mapped call.
+        f_polynomial_map = f_polynomial.map(d)
+        # Left side.
+        [lMTj_l, vMTj_l, dMj_l] = f_polynomial_map(
+            ca.reshape(Qskj_nsc[leftPolJointIdx, 1:], 1, nPolynomialJoints*d),
+            ca.reshape(Qdskj_nsc[leftPolJointIdx, 1:], 1, nPolynomialJoints*d))
+        # Right side.
+        [lMTj_r, vMTj_r, dMj_r] = f_polynomial_map(
+            ca.reshape(Qskj_nsc[rightPolJointIdx, 1:], 1, nPolynomialJoints*d),
+            ca.reshape(Qdskj_nsc[rightPolJointIdx, 1:], 1, nPolynomialJoints*d))
+        # Muscle-tendon lengths and velocities (one column per collocation
+        # point).
+        lMTj_lr = ca.vertcat(lMTj_l[leftPolMuscleIdx, :],
+                             lMTj_r[rightPolMuscleIdx, :])
+        vMTj_lr = ca.vertcat(vMTj_l[leftPolMuscleIdx, :],
+                             vMTj_r[rightPolMuscleIdx, :])
+
+        #######################################################################
+        # Hill-equilibrium.
+        [hillEquilibriumj, Fj, activeFiberForcej, passiveFiberForcej,
+         normActiveFiberLengthForcej, normFiberLengthj, fiberVelocityj] = (
+         f_hillEquilibrium.map(d)(akj[:, 1:], lMTj_lr, vMTj_lr,
+                                  normFkj_nsc[:, 1:], normFDtj_nsc))
+
+        #######################################################################
+        # Metabolic energy rate.
+        metabolicEnergyRatej = f_metabolicsBhargava.map(d)(
+            akj[:, 1:], akj[:, 1:], normFiberLengthj, fiberVelocityj,
+            activeFiberForcej, passiveFiberForcej,
+            normActiveFiberLengthForcej)[5]
+
+        #######################################################################
+        # Passive joint torques.
+        passiveTorquesj = f_passiveTorque.map(d)(
+            Qskj_nsc[idxPassiveTorqueJoints, 1:],
+            Qdskj_nsc[idxPassiveTorqueJoints, 1:])
+        # The linear passive torques are scalar functions; CasADi implicitly
+        # maps them over the joint rows and collocation columns.
+        linearPassiveTorqueArmsj = f_linearPassiveArmTorque(
+            Qskj_nsc[idxArmJoints, 1:], Qdskj_nsc[idxArmJoints, 1:])
+        if withMTP:
+            linearPassiveTorqueMtpj = f_linearPassiveMtpTorque(
+                Qskj_nsc[idxMtpJoints, 1:], Qdskj_nsc[idxMtpJoints, 1:])
+
         #######################################################################
         # Loop over collocation points.
         for j in range(d):
             ###################################################################
-            # Unscale variables.
-            # States.
-            normFkj_nsc = normFkj * (scalingF.to_numpy().T * np.ones((1, d+1)))
-            Qskj_nsc = Qskj * (scalingQs.to_numpy().T * np.ones((1, d+1)))
-            Qdskj_nsc = Qdskj * (scalingQds.to_numpy().T * np.ones((1, d+1)))
-            # Controls.
-            aDtk_nsc = aDtk * (scalingADt.to_numpy().T)
-            # Slack controls.
-            normFDtj_nsc = normFDtj * (
-                scalingFDt.to_numpy().T * np.ones((1, d)))
-            Qddsj_nsc = Qddsj * (scalingQdds.to_numpy().T * np.ones((1, d))) 
-            # Qs and Qds are intertwined in the external function.
-            QsQdskj_nsc = ca.MX(nJoints*2, d+1)
-            QsQdskj_nsc[::2, :] = Qskj_nsc
-            QsQdskj_nsc[1::2, :] = Qdskj_nsc   
-            
-            ###################################################################
-            # Polynomial approximations.
-            # Left side.
-            Qsinj_l = Qskj_nsc[leftPolJointIdx, j+1]
-            Qdsinj_l = Qdskj_nsc[leftPolJointIdx, j+1]
-            [lMTj_l, vMTj_l, dMj_l] = f_polynomial(Qsinj_l, Qdsinj_l)
-            # Right side.
-            Qsinj_r = Qskj_nsc[rightPolJointIdx, j+1]
-            Qdsinj_r = Qdskj_nsc[rightPolJointIdx, j+1]
-            [lMTj_r, vMTj_r, dMj_r] = f_polynomial(Qsinj_r, Qdsinj_r)
-            # Muscle-tendon lengths and velocities.        
-            lMTj_lr = ca.vertcat(lMTj_l[leftPolMuscleIdx], 
-                                 lMTj_r[rightPolMuscleIdx])
-            vMTj_lr = ca.vertcat(vMTj_l[leftPolMuscleIdx], 
-                                 vMTj_r[rightPolMuscleIdx])
-            # Moment arms.
+            # Moment arms. The mapped dMj_l / dMj_r lay the per-point moment
+            # arm matrices side by side, so column blocks of width nPolynomialJoints
+            # belong to collocation point j.
             dMj = {}
             # Left side.
-            for joint in leftPolynomialJoints:
-                if ((joint != 'mtp_angle_l') and 
-                    (joint != 'lumbar_extension') and
-                    (joint != 'lumbar_bending') and 
-                    (joint != 'lumbar_rotation')):
-                        dMj[joint] = dMj_l[momentArmIndices[joint], 
-                                           leftPolynomialJoints.index(joint)]
+            for joint in leftMomentArmJoints:
+                dMj[joint] = dMj_l[momentArmIndices[joint],
+                                   j*nPolynomialJoints +
+                                   leftPolynomialJoints.index(joint)]
             # Right side.
-            for joint in rightPolynomialJoints:
-                if ((joint != 'mtp_angle_r') and 
-                    (joint != 'lumbar_extension') and
-                    (joint != 'lumbar_bending') and 
-                    (joint != 'lumbar_rotation')):
-                        # We need to adjust momentArmIndices for the right side
-                        # since the polynomial indices are 'one-sided'. We 
-                        # subtract by the number of side muscles.
-                        c_ma = [
-                            i - nSideMuscles for i in momentArmIndices[joint]]
-                        dMj[joint] = dMj_r[c_ma,
-                                           rightPolynomialJoints.index(joint)]
+            for joint in rightMomentArmJoints:
+                # We need to adjust momentArmIndices for the right side
+                # since the polynomial indices are 'one-sided'. We
+                # subtract by the number of side muscles.
+                c_ma = momentArmIndices[joint] - nSideMuscles
+                dMj[joint] = dMj_r[c_ma,
+                                   j*nPolynomialJoints +
+                                   rightPolynomialJoints.index(joint)]
             # Trunk.
             for joint in trunkJoints:
-                dMj[joint] = dMj_l[trunkMomentArmPolynomialIndices, 
-                                   leftPolynomialJoints.index(joint)]            
-            
-            ###################################################################
-            # Hill-equilibrium.       
-            [hillEquilibriumj, Fj, activeFiberForcej, passiveFiberForcej,
-             normActiveFiberLengthForcej, normFiberLengthj, fiberVelocityj] = (
-             f_hillEquilibrium(akj[:, j+1], lMTj_lr, vMTj_lr, 
-                               normFkj_nsc[:, j+1], normFDtj_nsc[:, j])) 
-            
-            ###################################################################
-            # Metabolic energy rate.
-            metabolicEnergyRatej = f_metabolicsBhargava(
-                akj[:, j+1], akj[:, j+1], normFiberLengthj, fiberVelocityj, 
-                activeFiberForcej, passiveFiberForcej, 
-                normActiveFiberLengthForcej)[5]
-            
-            ###################################################################
-            # Passive joint torques.
-            passiveTorque_j = {}
-            passiveTorquesj = ca.MX(nPassiveTorqueJoints, 1)
-            for cj, joint in enumerate(passiveTorqueJoints):
-                passiveTorque_j[joint] = f_passiveTorque[joint](
-                    Qskj_nsc[joints.index(joint), j+1], 
-                    Qdskj_nsc[joints.index(joint), j+1])
-                passiveTorquesj[cj, 0] = passiveTorque_j[joint]
-                
-            linearPassiveTorqueArms_j = {}
-            for joint in armJoints:
-                linearPassiveTorqueArms_j[joint] = f_linearPassiveArmTorque(
-                    Qskj_nsc[joints.index(joint), j+1],
-                    Qdskj_nsc[joints.index(joint), j+1])
-                
-            if withMTP:
-                linearPassiveTorqueMtp_j = {}
-                for joint in mtpJoints:
-                    linearPassiveTorqueMtp_j[joint] = f_linearPassiveMtpTorque(
-                        Qskj_nsc[joints.index(joint), j+1],
-                        Qdskj_nsc[joints.index(joint), j+1])
-            
+                dMj[joint] = dMj_l[trunkMomentArmPolynomialIndices,
+                                   j*nPolynomialJoints +
+                                   leftPolynomialJoints.index(joint)]
+
             ###################################################################
             # Cost function.
-            metEnergyRateTerm = (f_NMusclesSum2(metabolicEnergyRatej) / 
+            metEnergyRateTerm = (f_NMusclesSum2(metabolicEnergyRatej[:, j]) /
                                        modelMass)
             activationTerm = f_NMusclesSum2(akj[:, j+1])
             armExcitationTerm = f_nArmJointsSum2(eArmk)             
             jointAccelerationTerm = (
                     f_nNoArmJointsSum2(Qddsj[idxNoArmJoints, j]))                
             passiveTorqueTerm = (
-                    f_nPassiveTorqueJointsSum2(passiveTorquesj))       
+                    f_nPassiveTorqueJointsSum2(passiveTorquesj[:, j]))       
             activationDtTerm = f_NMusclesSum2(aDtk)
             forceDtTerm = f_NMusclesSum2(normFDtj[:, j])
             armAccelerationTerm = f_nArmJointsSum2(Qddsj[idxArmJoints, j])
             
-            J += ((weights['metabolicEnergyRateTerm'] * metEnergyRateTerm +
-                   weights['activationTerm'] * activationTerm + 
-                   weights['armExcitationTerm'] * armExcitationTerm + 
-                   weights['jointAccelerationTerm'] * jointAccelerationTerm +                
-                   weights['passiveTorqueTerm'] * passiveTorqueTerm + 
-                   weights['controls'] * (forceDtTerm + activationDtTerm 
-                          + armAccelerationTerm)) * h * B[j + 1])
+            J += (h * B[j + 1]) * ca.dot(costWeights, ca.vertcat(
+                metEnergyRateTerm, activationTerm, armExcitationTerm,
+                jointAccelerationTerm, passiveTorqueTerm, forceDtTerm,
+                activationDtTerm, armAccelerationTerm))
             
             ###################################################################
             # Expression for the state derivatives at the collocation points.
@@ -1032,15 +1125,12 @@ for case in cases:
             # Muscle activation dynamics (implicit formulation).
             eq_constr.append((h*aDtk_nsc - ap))
             # Muscle contraction dynamics (implicit formulation)  .
-            eq_constr.append((h*normFDtj_nsc[:, j] - normFp_nsc) / 
-                            scalingF.to_numpy().T)
+            eq_constr.append((h*normFDtj_nsc[:, j] - normFp_nsc) / scF)
             # Skeleton dynamics (implicit formulation).
             # Position derivatives.
-            eq_constr.append((h*Qdskj_nsc[:, j+1] - Qsp_nsc) / 
-                             scalingQs.to_numpy().T)
+            eq_constr.append((h*Qdskj_nsc[:, j+1] - Qsp_nsc) / scQs)
             # Velocity derivatives.
-            eq_constr.append((h*Qddsj_nsc[:, j] - Qdsp_nsc) / 
-                            scalingQds.to_numpy().T)
+            eq_constr.append((h*Qddsj_nsc[:, j] - Qdsp_nsc) / scQds)
             # Arm activation dynamics (explicit formulation).
             aArmDtj = f_armActivationDynamics(eArmk, aArmkj[:, j+1])
             eq_constr.append(h*aArmDtj - aArmp)
@@ -1056,31 +1146,27 @@ for case in cases:
             
             ###################################################################
             # Implicit skeleton dynamics.
-            # Muscle-driven joint torques 
-            for joint in muscleDrivenJoints:                
-                Fj_joint = Fj[momentArmIndices[joint]]
-                mTj_joint = ca.sum1(dMj[joint]*Fj_joint) 
-                diffTj_joint = f_diffTorques(
-                    Tj[joints.index(joint)], mTj_joint, passiveTorque_j[joint])
-                eq_constr.append(diffTj_joint)
+            # Muscle-driven joint torques. The muscle torques are stacked in
+            # one vector and the residuals follow from a single call to
+            # f_diffTorques, which CasADi implicitly maps over the vector.
+            mTj = ca.vertcat(*[
+                ca.sum1(dMj[joint] * Fj[momentArmIndices[joint], j])
+                for joint in muscleDrivenJoints])
+            eq_constr.append(f_diffTorques(
+                Tj[idxMuscleDrivenJoints],
+                mTj, passiveTorquesj[idxMuscleDrivenJointsInPassive, j]))
             
-            # Torque-driven joint torques (arm joints)
-            for cj, joint in enumerate(armJoints):
-                diffTj_joint = f_diffTorques(
-                    Tj[joints.index(joint)] / scalingArmE.iloc[0][joint],
-                    aArmkj[cj, j+1], linearPassiveTorqueArms_j[joint] /
-                    scalingArmE.iloc[0][joint])
-                eq_constr.append(diffTj_joint)
-                
+            # Torque-driven joint torques (arm joints).
+            eq_constr.append(f_diffTorques(
+                Tj[idxArmJoints] / scArmE, aArmkj[:, j+1],
+                linearPassiveTorqueArmsj[:, j] / scArmE))
+
             if withMTP:
                 # Passive joint torques (mtp joints).
-                for joint in mtpJoints:
-                    diffTj_joint = f_diffTorques(
-                        Tj[joints.index(joint)] / scalingMtpE.iloc[0][joint], 
-                        0, (passiveTorque_j[joint] +  
-                            linearPassiveTorqueMtp_j[joint]) /
-                        scalingMtpE.iloc[0][joint])
-                    eq_constr.append(diffTj_joint)          
+                eq_constr.append(f_diffTorques(
+                    Tj[idxMtpJoints] / scMtpE, 0,
+                    (passiveTorquesj[idxMtpJointsInPassive, j] +
+                     linearPassiveTorqueMtpj[:, j]) / scMtpE))
             
             ###################################################################
             # Implicit activation dynamics.
@@ -1091,20 +1177,19 @@ for case in cases:
             
             ###################################################################
             # Implicit contraction dynamics.
-            eq_constr.append(hillEquilibriumj)
+            eq_constr.append(hillEquilibriumj[:, j])
             
             ###################################################################
-            # Prevent collision between body parts.
-            diffCalcOrs = ca.sumsqr(Tj[idxCalcOr_r] - Tj[idxCalcOr_l])
-            ineq_constr3.append(diffCalcOrs)
-            diffFemurHandOrs_r = ca.sumsqr(Tj[idxFemurOr_r] - Tj[idxHandOr_r])
-            ineq_constr4.append(diffFemurHandOrs_r)
-            diffFemurHandOrs_l = ca.sumsqr(Tj[idxFemurOr_l] - Tj[idxHandOr_l])
-            ineq_constr4.append(diffFemurHandOrs_l)
-            diffTibiaOrs = ca.sumsqr(Tj[idxTibiaOr_r] - Tj[idxTibiaOr_l])
-            ineq_constr5.append(diffTibiaOrs)
-            diffToesOrs = ca.sumsqr(Tj[idxToesOr_r] - Tj[idxToesOr_l])
-            ineq_constr6.append(diffToesOrs)
+            # Prevent collision between body parts. The five squared
+            # distances come from one stacked difference, one column per
+            # origin pair.
+            diffOrs = ca.reshape(Tj[idxCollisionA] - Tj[idxCollisionB], 2, 5)
+            sumSqrOrs = ca.sum1(diffOrs * diffOrs)
+            ineq_constr3.append(sumSqrOrs[0])
+            ineq_constr4.append(sumSqrOrs[1])
+            ineq_constr4.append(sumSqrOrs[2])
+            ineq_constr5.append(sumSqrOrs[3])
+            ineq_constr6.append(sumSqrOrs[4])
         # End loop over collocation points.
         
         #######################################################################
@@ -1143,19 +1228,18 @@ for case in cases:
                 
         #######################################################################
         # Equality / continuity constraints.
-        # Loop over mesh points.
-        for k in range(N):
-            akj2 = (ca.horzcat(a[:, k], a_col[:, k*d:(k+1)*d]))
-            normFkj2 = (ca.horzcat(normF[:, k], normF_col[:, k*d:(k+1)*d]))
-            Qskj2 = (ca.horzcat(Qs[:, k], Qs_col[:, k*d:(k+1)*d]))
-            Qdskj2 = (ca.horzcat(Qds[:, k], Qds_col[:, k*d:(k+1)*d]))    
-            aArmkj2 = (ca.horzcat(aArm[:, k], aArm_col[:, k*d:(k+1)*d]))
-            
-            opti.subject_to(a[:, k+1] == ca.mtimes(akj2, D))
-            opti.subject_to(normF[:, k+1] == ca.mtimes(normFkj2, D))    
-            opti.subject_to(Qs[:, k+1] == ca.mtimes(Qskj2, D))
-            opti.subject_to(Qds[:, k+1] == ca.mtimes(Qdskj2, D))    
-            opti.subject_to(aArm[:, k+1] == ca.mtimes(aArmkj2, D)) 
+        # The end state of each mesh interval follows from the interpolating
+        # polynomial through the mesh point and the d collocation points.
+        # Column i of every interval sits at stride d in the collocation
+        # matrices, so writing the product out per interpolation coefficient
+        # gives one constraint per state over the whole horizon instead of
+        # five per mesh point.
+        for X, X_col in ((a, a_col), (normF, normF_col), (Qs, Qs_col),
+                         (Qds, Qds_col), (aArm, aArm_col)):
+            Xend = D[0] * X[:, :-1]
+            for i in range(d):
+                Xend = Xend + D[i+1] * X_col[:, i::d]
+            opti.subject_to(X[:, 1:] == Xend)
             
         #######################################################################
         # Periodic constraints on states.
@@ -1178,8 +1262,8 @@ for case in cases:
         #######################################################################
         # Average speed constraint.
         Qs_nsc = Qs * (scalingQs.to_numpy().T * np.ones((1, N+1)))
-        distTraveled =  (Qs_nsc[joints.index('pelvis_tx'), -1] - 
-                                Qs_nsc[joints.index('pelvis_tx'), 0])
+        distTraveled =  (Qs_nsc[idxPelvisTx, -1] - 
+                                Qs_nsc[idxPelvisTx, 0])
         averageSpeed = distTraveled / finalTime
         opti.subject_to(averageSpeed - targetSpeed == 0)
         
@@ -1221,75 +1305,54 @@ for case in cases:
         # Because we had to replace bounds by constraints, we cannot retrieve
         # the optimal values using opti. The order below follows the order in
         # which the opti variables were declared.
-        NParameters = 1    
+        NParameters = 1
         finalTime_opt = w_opt[:NParameters]
-        starti = NParameters    
-        a_opt = (np.reshape(w_opt[starti:starti+nMuscles*(N+1)],
-                                  (N+1, nMuscles))).T
-        starti = starti + nMuscles*(N+1)
-        a_col_opt = (np.reshape(w_opt[starti:starti+nMuscles*(d*N)],
-                                      (d*N, nMuscles))).T    
-        starti = starti + nMuscles*(d*N)
-        normF_opt = (np.reshape(w_opt[starti:starti+nMuscles*(N+1)],
-                                      (N+1, nMuscles))  ).T  
-        starti = starti + nMuscles*(N+1)
-        normF_col_opt = (np.reshape(w_opt[starti:starti+nMuscles*(d*N)],
-                                          (d*N, nMuscles))).T
-        starti = starti + nMuscles*(d*N)
-        Qs_opt = (np.reshape(w_opt[starti:starti+nJoints*(N+1)],
-                                   (N+1, nJoints))  ).T  
-        starti = starti + nJoints*(N+1)    
-        Qs_col_opt = (np.reshape(w_opt[starti:starti+nJoints*(d*N)],
-                                       (d*N, nJoints))).T
-        starti = starti + nJoints*(d*N)
-        Qds_opt = (np.reshape(w_opt[starti:starti+nJoints*(N+1)],
-                                      (N+1, nJoints)) ).T   
-        starti = starti + nJoints*(N+1)    
-        Qds_col_opt = (np.reshape(w_opt[starti:starti+nJoints*(d*N)],
-                                          (d*N, nJoints))).T
-        starti = starti + nJoints*(d*N)    
-        aArm_opt = (np.reshape(w_opt[starti:starti+nArmJoints*(N+1)],
-                                     (N+1, nArmJoints))).T
-        starti = starti + nArmJoints*(N+1)    
-        aArm_col_opt = (np.reshape(w_opt[starti:starti+nArmJoints*(d*N)],
-                                         (d*N, nArmJoints))).T
-        starti = starti + nArmJoints*(d*N)
-        aDt_opt = (np.reshape(w_opt[starti:starti+nMuscles*N],
-                              (N, nMuscles))).T
-        starti = starti + nMuscles*N
-        eArm_opt = (np.reshape(w_opt[starti:starti+nArmJoints*N],
-                               (N, nArmJoints))).T
-        starti = starti + nArmJoints*N 
-        normFDt_col_opt = (np.reshape(w_opt[starti:starti+nMuscles*(d*N)],
-                                            (d*N, nMuscles))).T
-        starti = starti + nMuscles*(d*N)
-        Qdds_col_opt = (np.reshape(w_opt[starti:starti+nJoints*(d*N)],
-                                             (d*N, nJoints))).T
-        starti = starti + nJoints*(d*N)
-        
+        # Layout of the remaining variables: (number of rows, number of
+        # columns), in declaration order. Each slab is reshaped with a single
+        # pass of a running offset.
+        layout = [(nMuscles, N+1), (nMuscles, d*N),       # a, a_col
+                  (nMuscles, N+1), (nMuscles, d*N),       # normF, normF_col
+                  (nJoints, N+1), (nJoints, d*N),         # Qs, Qs_col
+                  (nJoints, N+1), (nJoints, d*N),         # Qds, Qds_col
+                  (nArmJoints, N+1), (nArmJoints, d*N),   # aArm, aArm_col
+                  (nMuscles, N), (nArmJoints, N),         # aDt, eArm
+                  (nMuscles, d*N), (nJoints, d*N)]        # normFDt_col,
+                                                          # Qdds_col
+        starti = NParameters
+        slabs = []
+        for nRows, nCols in layout:
+            slabs.append(np.reshape(
+                w_opt[starti:starti + nRows*nCols], (nCols, nRows)).T)
+            starti = starti + nRows*nCols
+        (a_opt, a_col_opt, normF_opt, normF_col_opt, Qs_opt, Qs_col_opt,
+         Qds_opt, Qds_col_opt, aArm_opt, aArm_col_opt, aDt_opt, eArm_opt,
+         normFDt_col_opt, Qdds_col_opt) = slabs
+
         assert (starti == w_opt.shape[0]), "error when extracting results"
             
-        # %% Unscale some of the optimal variables.
-        normF_opt_nsc = normF_opt * (scalingF.to_numpy().T * np.ones((1, N+1)))
-        normF_col_opt_nsc = (
-            normF_col_opt * (scalingF.to_numpy().T * np.ones((1, d*N))))  
-        Qs_opt_nsc = Qs_opt * (scalingQs.to_numpy().T * np.ones((1, N+1)))
-        Qs_col_opt_nsc = (
-            Qs_col_opt * (scalingQs.to_numpy().T * np.ones((1, d*N))))
-        Qds_opt_nsc = Qds_opt * (scalingQds.to_numpy().T * np.ones((1, N+1)))
-        Qds_col_opt_nsc = (
-            Qds_col_opt * (scalingQds.to_numpy().T * np.ones((1, d*N))))
-        aDt_opt_nsc = aDt_opt * (scalingADt.to_numpy().T * np.ones((1, N)))
-        Qdds_col_opt_nsc = (
-            Qdds_col_opt * (scalingQdds.to_numpy().T * np.ones((1, d*N))))
-        normFDt_col_opt_nsc = (
-            normFDt_col_opt * (scalingFDt.to_numpy().T * np.ones((1, d*N))))
+        # %% Unscale some of the optimal variables. The scalings are
+        # per-variable column vectors that broadcast across all time points.
+        scF = scalingF.to_numpy().reshape(-1, 1)
+        scQs = scalingQs.to_numpy().reshape(-1, 1)
+        scQds = scalingQds.to_numpy().reshape(-1, 1)
+        scADt = scalingADt.to_numpy().reshape(-1, 1)
+        scQdds = scalingQdds.to_numpy().reshape(-1, 1)
+        scFDt = scalingFDt.to_numpy().reshape(-1, 1)
+        normF_opt_nsc = normF_opt * scF
+        normF_col_opt_nsc = normF_col_opt * scF
+        Qs_opt_nsc = Qs_opt * scQs
+        Qs_col_opt_nsc = Qs_col_opt * scQs
+        Qds_opt_nsc = Qds_opt * scQds
+        Qds_col_opt_nsc = Qds_col_opt * scQds
+        aDt_opt_nsc = aDt_opt * scADt
+        Qdds_col_opt_nsc = Qdds_col_opt * scQdds
+        normFDt_col_opt_nsc = normFDt_col_opt * scFDt
         normFDt_opt_nsc = normFDt_col_opt_nsc[:,d-1::d]
         aArm_opt_nsc = aArm_opt * scalingArmE.iloc[0]['arm_rot_r']
         
         # %% Sanity check: make sure the target speed is matched.
-        distTraveled_opt = (Qs_opt_nsc[joints.index('pelvis_tx'), -1] - 
-                            Qs_opt_nsc[joints.index('pelvis_tx'), 0])
+        distTraveled_opt = (Qs_opt_nsc[idxPelvisTx, -1] - 
+                            Qs_opt_nsc[idxPelvisTx, 0])
         averageSpeed = distTraveled_opt / finalTime_opt
         assert (np.abs(averageSpeed - targetSpeed) < 10**(-tol)), (
             "Error: Target speed constraint not satisfied")
@@ -1298,56 +1361,51 @@ for case in cases:
         # reconstruct a full gait cycle. Also do some sanity checks with
         # non-muscle-driven joints.
         
-        # Passive torques.
+        # Passive torques. The scalar torque functions map elementwise over
+        # matrix arguments, so each set is evaluated in one call over all
+        # mesh points.
         # Arms.
-        linearPassiveTorqueArms_opt = np.zeros((nArmJoints, N+1))        
-        for k in range(N+1):
-            for cj, joint in enumerate(armJoints):
-                linearPassiveTorqueArms_opt[cj, k] = f_linearPassiveArmTorque(
-                    Qs_opt_nsc[joints.index(joint), k],
-                    Qds_opt_nsc[joints.index(joint), k])
+        linearPassiveTorqueArms_opt = f_linearPassiveArmTorque(
+            Qs_opt_nsc[idxArmJoints, :],
+            Qds_opt_nsc[idxArmJoints, :]).full()
         if withMTP:
-            # Mtps.        
-            linearPassiveTorqueMtp_opt = np.zeros((nMtpJoints, N+1))
-            passiveTorqueMtp_opt = np.zeros((nMtpJoints, N+1))        
-            for k in range(N+1):
-                for cj, joint in enumerate(mtpJoints):
-                    linearPassiveTorqueMtp_opt[cj, k] = (
-                        f_linearPassiveMtpTorque(
-                            Qs_opt_nsc[joints.index(joint), k],
-                            Qds_opt_nsc[joints.index(joint), k]))
-                    passiveTorqueMtp_opt[cj, k] = f_passiveTorque[joint](
-                        Qs_opt_nsc[joints.index(joint), k], 
-                        Qds_opt_nsc[joints.index(joint), k])
-                
+            # Mtps.
+            linearPassiveTorqueMtp_opt = f_linearPassiveMtpTorque(
+                Qs_opt_nsc[idxMtpJoints, :],
+                Qds_opt_nsc[idxMtpJoints, :]).full()
+            passiveTorqueMtp_opt = f_passiveTorque(
+                Qs_opt_nsc[idxPassiveTorqueJoints, :],
+                Qds_opt_nsc[idxPassiveTorqueJoints, :]).full()[
+                    idxMtpJointsInPassive, :]
+
         # Ground reactions forces
-        QsQds_opt_nsc = np.zeros((nJoints*2, N+1))
-        QsQds_opt_nsc[::2, :] = Qs_opt_nsc
-        QsQds_opt_nsc[1::2, :] = Qds_opt_nsc
+        # Interleave positions and velocities row-wise (Qs0, Qds0, Qs1, ...)
+        # as expected by the external function.
+        QsQds_opt_nsc = np.stack(
+            (Qs_opt_nsc, Qds_opt_nsc), axis=1).reshape(nJoints*2, N+1)
         Qdds_opt = Qdds_col_opt_nsc[:,d-1::d]
-        F1_out = np.zeros((NF1_out, N))
-        armT = np.zeros((nArmJoints, N))
+        # Evaluate the external function over all mesh points in one mapped
+        # call; the states and accelerations stack into one (3*nJoints, N)
+        # input block.
+        F1_out = F1.map(N)(np.concatenate(
+            (QsQds_opt_nsc[:, 1:], Qdds_opt))).full()
+        # Per-joint scaling factors, pulled out of the DataFrames once
+        # rather than per mesh point.
+        scArmE = scalingArmE.iloc[0][armJoints].to_numpy().reshape(-1, 1)
         if withMTP:
-            mtpT = np.zeros((nMtpJoints, N))
-        for k in range(N):    
-            Tj = F1(ca.vertcat(QsQds_opt_nsc[:, k+1], Qdds_opt[:, k]))
-            F1_out[:, k] = Tj.full().T            
-            for cj, joint in enumerate(armJoints):
-                armT[cj, k] = f_diffTorques(
-                    F1_out[joints.index(joint), k] / 
-                    scalingArmE.iloc[0][joint],
-                    aArm_opt[cj, k+1], 
-                    linearPassiveTorqueArms_opt[cj, k+1] /
-                    scalingArmE.iloc[0][joint])
-            if withMTP:
-                for cj, joint in enumerate(mtpJoints):
-                    mtpT[cj, k] = f_diffTorques(
-                        F1_out[joints.index(joint), k] / 
-                        scalingMtpE.iloc[0][joint],
-                        0, 
-                        (linearPassiveTorqueMtp_opt[cj, k+1] + 
-                         passiveTorqueMtp_opt[cj, k+1]) /
-                        scalingMtpE.iloc[0][joint])
+            scMtpE = scalingMtpE.iloc[0][mtpJoints].to_numpy().reshape(-1, 1)
+        # The scalar torque-difference function maps elementwise over the
+        # (nJoints, N) blocks, so each check is a single call.
+        armT = f_diffTorques(
+            F1_out[idxArmJoints, :] / scArmE,
+            aArm_opt[:, 1:],
+            linearPassiveTorqueArms_opt[:, 1:] / scArmE).full()
+        if withMTP:
+            mtpT = f_diffTorques(
+                F1_out[idxMtpJoints, :] / scMtpE,
+                0,
+                (linearPassiveTorqueMtp_opt[:, 1:] +
+                 passiveTorqueMtp_opt[:, 1:]) / scMtpE).full()
         GRF_opt = F1_out[idxGRF, :]
         
         # Sanity checks.
@@ -1373,19 +1431,19 @@ for case in cases:
                 Qs_opt_nsc[idxPerQsJointsB, :-1])
         Qs_GC[idxPerOppJoints, N-idxIC_s[0]:N-idxIC_s[0]+N] = (
                 -Qs_opt_nsc[idxPerOppJoints, :-1])
-        Qs_GC[joints.index('pelvis_tx'), N-idxIC_s[0]:N-idxIC_s[0]+N]  = (
-                Qs_opt_nsc[joints.index('pelvis_tx'), :-1] + 
-                Qs_opt_nsc[joints.index('pelvis_tx'), -1])
+        Qs_GC[idxPelvisTx, N-idxIC_s[0]:N-idxIC_s[0]+N]  = (
+                Qs_opt_nsc[idxPelvisTx, :-1] + 
+                Qs_opt_nsc[idxPelvisTx, -1])
         Qs_GC[:, N-idxIC_s[0]+N:2*N] = Qs_opt_nsc[:,:idxIC_s[0]] 
-        Qs_GC[joints.index('pelvis_tx'), N-idxIC_s[0]+N:2*N] = (
-                Qs_opt_nsc[joints.index('pelvis_tx'),:idxIC_s[0]] + 
-                2*Qs_opt_nsc[joints.index('pelvis_tx'), -1])
+        Qs_GC[idxPelvisTx, N-idxIC_s[0]+N:2*N] = (
+                Qs_opt_nsc[idxPelvisTx,:idxIC_s[0]] + 
+                2*Qs_opt_nsc[idxPelvisTx, -1])
         if legIC == "left":
             Qs_GC[idxPerQsJointsA, :] = Qs_GC[idxPerQsJointsB, :]
             Qs_GC[idxPerOppJoints, :] = (
                     -Qs_GC[idxPerOppJoints, :])
-        Qs_GC[joints.index('pelvis_tx'), :] -= (
-            Qs_GC[joints.index('pelvis_tx'), 0])
+        Qs_GC[idxPelvisTx, :] -= (
+            Qs_GC[idxPelvisTx, 0])
         Qs_GC[idxRotJoints, :] = Qs_GC[idxRotJoints, :] * 180 / np.pi
     
         # Joint velocities.
@@ -1451,96 +1509,78 @@ for case in cases:
         if legIC == "left":
             aArm_GC = aArm_GC[idxPerArmJoints, :]
             
-        # Time grid.
+        # Time grid: the mesh times of both half gait cycles, the second one
+        # shifted by the optimal final time.
         tgrid = np.linspace(0, finalTime_opt[0], N+1)
-        tgrid_GC = np.zeros((1, 2*N)) 
-        tgrid_GC[:,:N] = tgrid[:N].T
-        tgrid_GC[:,N:] = tgrid[:N].T + tgrid[-1].T
+        tgrid_GC = np.concatenate(
+            (tgrid[:N], tgrid[:N] + tgrid[-1])).reshape(1, 2*N)
         
         # %% Compute metabolic cost of transport over entire gait cycle.   
-        Qs_GC_rad = Qs_GC.copy()        
-        Qs_GC_rad[idxRotJoints, :] = Qs_GC_rad[idxRotJoints, :] * np.pi/180
-        Qds_GC_rad = Qds_GC.copy()        
-        Qds_GC_rad[idxRotJoints, :] = Qds_GC_rad[idxRotJoints, :] * np.pi/180   
+        # Per-joint conversion factors: pi/180 for rotational joints, 1 for
+        # translations; one broadcast multiply replaces copy plus scatter.
+        radScale = np.ones((nJoints, 1))
+        radScale[idxRotJoints] = np.pi / 180
+        Qs_GC_rad = Qs_GC * radScale
+        Qds_GC_rad = Qds_GC * radScale
         basal_coef = 1.2
-        basal_exp = 1    
-        metERatePerMuscle = np.zeros((nMuscles,2*N))
-        tolMetERate = np.zeros((1,2*N))
-        actHeatRate = np.zeros((1,2*N))
-        mtnHeatRate = np.zeros((1,2*N))
-        shHeatRate = np.zeros((1,2*N))
-        mechWRate = np.zeros((1,2*N))
-        normFiberLength_GC = np.zeros((nMuscles,2*N))
-        fiberVelocity_GC = np.zeros((nMuscles,2*N))
-        actHeatRate_GC = np.zeros((nMuscles,2*N))
-        mtnHeatRate_GC = np.zeros((nMuscles,2*N))
-        shHeatRate_GC = np.zeros((nMuscles,2*N))
-        mechWRate_GC = np.zeros((nMuscles,2*N))
-        for k in range(2*N):
-            ###################################################################
-            # Polynomial approximations.
-            # Left leg.
-            Qsk_GC_l = Qs_GC_rad[leftPolJointIdx, k]
-            Qdsk_GC_l = Qds_GC_rad[leftPolJointIdx, k]
-            [lMTk_GC_l, vMTk_GC_l, _] = f_polynomial(Qsk_GC_l, Qdsk_GC_l)       
-            # Right leg.
-            Qsk_GC_r = Qs_GC_rad[rightPolJointIdx, k]
-            Qdsk_GC_r = Qds_GC_rad[rightPolJointIdx, k]
-            [lMTk_GC_r, vMTk_GC_r, _] = f_polynomial(Qsk_GC_r, Qdsk_GC_r)
-            # Both leg.
-            lMTk_GC_lr = ca.vertcat(lMTk_GC_l[leftPolMuscleIdx], 
-                                     lMTk_GC_r[rightPolMuscleIdx])
-            vMTk_GC_lr = ca.vertcat(vMTk_GC_l[leftPolMuscleIdx], 
-                                     vMTk_GC_r[rightPolMuscleIdx])
-            
-            ###################################################################
-            # Derive Hill-equilibrium.       
-            [hillEquilibriumk_GC, Fk_GC, activeFiberForcek_GC, 
-             passiveFiberForcek_GC, normActiveFiberLengthForcek_GC, 
-             normFiberLengthk_GC, fiberVelocityk_GC] = (
-                 f_hillEquilibrium(A_GC[:, k], lMTk_GC_lr, vMTk_GC_lr,
-                                   F_GC[:, k], FDt_GC[:, k]))   
-                 
-            if stats['success'] == True:
-                assert np.all(
-                    np.abs(hillEquilibriumk_GC.full()) <= 10**(tol)), (
-                        "Error in Hill equilibrium")
-                 
-            normFiberLength_GC[:,k] = normFiberLengthk_GC.full().flatten()
-            fiberVelocity_GC[:,k] = fiberVelocityk_GC.full().flatten()
-            
-            ###################################################################
-            # Get metabolic energy rate.
-            [actHeatRatek_GC, mtnHeatRatek_GC, 
-             shHeatRatek_GC, mechWRatek_GC, _, 
-             metabolicEnergyRatek_GC] = f_metabolicsBhargava(
-                 A_GC[:, k], A_GC[:, k], normFiberLengthk_GC, 
-                 fiberVelocityk_GC, activeFiberForcek_GC,
-                 passiveFiberForcek_GC, normActiveFiberLengthForcek_GC)
-                 
-            metERatePerMuscle[:, k:k+1] = (
-                metabolicEnergyRatek_GC.full())
-                 
-            # Sum over all muscles.                
-            metabolicEnergyRatek_allMuscles = np.sum(
-                metabolicEnergyRatek_GC.full())
-            actHeatRatek_allMuscles = np.sum(actHeatRatek_GC.full())
-            mtnHeatRatek_allMuscles = np.sum(mtnHeatRatek_GC.full())
-            shHeatRatek_allMuscles = np.sum(shHeatRatek_GC.full())
-            mechWRatek_allMuscles = np.sum(mechWRatek_GC.full())
-            actHeatRate_GC[:,k] = actHeatRatek_GC.full().flatten()
-            mtnHeatRate_GC[:,k] = mtnHeatRatek_GC.full().flatten()
-            shHeatRate_GC[:,k] = shHeatRatek_GC.full().flatten()
-            mechWRate_GC[:,k] = mechWRatek_GC.full().flatten()
-            
-            # Add basal rate.
-            basalRatek = basal_coef*modelMass**basal_exp
-            tolMetERate[0, k] = (metabolicEnergyRatek_allMuscles + basalRatek) 
-            actHeatRate[0, k] = actHeatRatek_allMuscles
-            mtnHeatRate[0, k] = mtnHeatRatek_allMuscles
-            shHeatRate[0, k] = shHeatRatek_allMuscles
-            mechWRate[0, k] = mechWRatek_allMuscles            
-            
+        basal_exp = 1
+        #######################################################################
+        # Polynomial approximations, evaluated with a single mapped call over
+        # the whole gait cycle. The row-vector inputs of f_polynomial
+        # concatenate per-point columns under a column-major reshape.
+        f_polynomial_GC = f_polynomial.map(2*N)
+        # Left leg.
+        [lMT_GC_l, vMT_GC_l, _] = f_polynomial_GC(
+            Qs_GC_rad[leftPolJointIdx, :].reshape(1, -1, order='F'),
+            Qds_GC_rad[leftPolJointIdx, :].reshape(1, -1, order='F'))
+        # Right leg.
+        [lMT_GC_r, vMT_GC_r, _] = f_polynomial_GC(
+            Qs_GC_rad[rightPolJointIdx, :].reshape(1, -1, order='F'),
+            Qds_GC_rad[rightPolJointIdx, :].reshape(1, -1, order='F'))
+        # Both legs.
+        lMT_GC_lr = ca.vertcat(lMT_GC_l[leftPolMuscleIdx, :],
+                               lMT_GC_r[rightPolMuscleIdx, :])
+        vMT_GC_lr = ca.vertcat(vMT_GC_l[leftPolMuscleIdx, :],
+                               vMT_GC_r[rightPolMuscleIdx, :])
+
+        #######################################################################
+        # Derive Hill-equilibrium at all gait-cycle frames at once.
+        [hillEquilibrium_GC, _, activeFiberForce_GC, passiveFiberForce_GC,
+         normActiveFiberLengthForce_GC, normFiberLength_GC_dm,
+         fiberVelocity_GC_dm] = f_hillEquilibrium.map(2*N)(
+             A_GC, lMT_GC_lr, vMT_GC_lr, F_GC, FDt_GC)
+
+        if stats['success'] == True:
+            assert np.all(np.abs(hillEquilibrium_GC.full()) <= 10**(tol)), (
+                "Error in Hill equilibrium")
+
+        normFiberLength_GC = normFiberLength_GC_dm.full()
+        fiberVelocity_GC = fiberVelocity_GC_dm.full()
+
+        #######################################################################
+        # Get metabolic energy rate.
+        [actHeatRate_GC_dm, mtnHeatRate_GC_dm, shHeatRate_GC_dm,
+         mechWRate_GC_dm, _, metabolicEnergyRate_GC] = (
+            f_metabolicsBhargava.map(2*N)(
+                A_GC, A_GC, normFiberLength_GC_dm, fiberVelocity_GC_dm,
+                activeFiberForce_GC, passiveFiberForce_GC,
+                normActiveFiberLengthForce_GC))
+
+        metERatePerMuscle = metabolicEnergyRate_GC.full()
+        actHeatRate_GC = actHeatRate_GC_dm.full()
+        mtnHeatRate_GC = mtnHeatRate_GC_dm.full()
+        shHeatRate_GC = shHeatRate_GC_dm.full()
+        mechWRate_GC = mechWRate_GC_dm.full()
+
+        # Sum over all muscles and add basal rate.
+        basalRate = basal_coef*modelMass**basal_exp
+        tolMetERate = (
+            np.sum(metERatePerMuscle, axis=0, keepdims=True) + basalRate)
+        actHeatRate = np.sum(actHeatRate_GC, axis=0, keepdims=True)
+        mtnHeatRate = np.sum(mtnHeatRate_GC, axis=0, keepdims=True)
+        shHeatRate = np.sum(shHeatRate_GC, axis=0, keepdims=True)
+        mechWRate = np.sum(mechWRate_GC, axis=0, keepdims=True)
+
         # Integrate.
         metERatePerMuscle_int = np.trapezoid(
             metERatePerMuscle, tgrid_GC)
@@ -1551,8 +1591,8 @@ for case in cases:
         mechWRate_int = np.trapezoid(mechWRate, tgrid_GC)
         
         # Total distance traveled.
-        distTraveled_GC = (Qs_GC_rad[joints.index('pelvis_tx'),-1] - 
-                           Qs_GC_rad[joints.index('pelvis_tx'),0])
+        distTraveled_GC = (Qs_GC_rad[idxPelvisTx,-1] - 
+                           Qs_GC_rad[idxPelvisTx,0])
         
         # Cost of transport (COT).
         COT_GC = tolMetERate_int / modelMass / distTraveled_GC
@@ -1564,19 +1604,13 @@ for case in cases:
         
         # %% Compute stride length and extract GRFs, GRMs, and joint torques
         # over the entire gait cycle.
-        QsQds_opt_nsc_GC = np.zeros((nJoints*2, N*2))
-        QsQds_opt_nsc_GC[::2, :] = Qs_GC_rad
-        QsQds_opt_nsc_GC[1::2, :] = Qds_GC_rad        
-        Qdds_GC_rad = Qdds_GC.copy()
-        Qdds_GC_rad[idxRotJoints, :] = (
-            Qdds_GC_rad[idxRotJoints, :] * np.pi / 180)        
-        F1_GC = np.zeros((NF1_out, N*2))
-        for k_GC in range(N*2):
-            Tk_GC = F1(ca.vertcat(QsQds_opt_nsc_GC[:,k_GC],
-                                  Qdds_GC_rad[:, k_GC]))
-            F1_GC[:, k_GC] = Tk_GC.full().T        
-        stride_length_GC = ca.norm_2(F1_GC[idxCalcOr3D_r, 0] - 
-                                     F1_GC[idxCalcOr3D_r, -1]).full()[0][0]
+        QsQds_opt_nsc_GC = np.stack(
+            (Qs_GC_rad, Qds_GC_rad), axis=1).reshape(nJoints*2, N*2)
+        Qdds_GC_rad = Qdds_GC * radScale
+        F1_GC = F1.map(N*2)(np.concatenate(
+            (QsQds_opt_nsc_GC, Qdds_GC_rad))).full()
+        stride_length_GC = np.linalg.norm(F1_GC[idxCalcOr3D_r, 0] -
+                                          F1_GC[idxCalcOr3D_r, -1])
         GRF_GC = F1_GC[idxGRF, :]
         GRM_GC = F1_GC[idxGRM, :]
         torques_GC = F1_GC[getJointIndices(joints, joints), :] 
@@ -1586,152 +1620,114 @@ for case in cases:
         # Missing matrix B, add manually (again in case only analyzing).
         B = [-8.88178419700125e-16, 0.376403062700467, 0.512485826188421, 
              0.111111111111111]
-        metabolicEnergyRateTerm_opt_all = 0
-        activationTerm_opt_all = 0
-        armExcitationTerm_opt_all = 0
-        jointAccelerationTerm_opt_all = 0
-        passiveTorqueTerm_opt_all = 0
-        activationDtTerm_opt_all = 0
-        forceDtTerm_opt_all = 0
-        armAccelerationTerm_opt_all = 0
         h_opt = finalTime_opt / N
-        for k in range(N):
-            # States.
-            akj_opt = (ca.horzcat(a_opt[:, k], a_col_opt[:, k*d:(k+1)*d]))
-            normFkj_opt = (
-                ca.horzcat(normF_opt[:, k], normF_col_opt[:, k*d:(k+1)*d]))
-            normFkj_opt_nsc = (
-                normFkj_opt * (scalingF.to_numpy().T * np.ones((1, d+1)))) 
-            Qskj_opt = (
-                ca.horzcat(Qs_opt[:, k], Qs_col_opt[:, k*d:(k+1)*d]))
-            Qskj_opt_nsc = (
-                Qskj_opt * (scalingQs.to_numpy().T * np.ones((1, d+1))))
-            Qdskj_opt = (
-                ca.horzcat(Qds_opt[:, k], Qds_col_opt[:, k*d:(k+1)*d]))
-            Qdskj_opt_nsc = (
-                Qdskj_opt * (scalingQds.to_numpy().T * np.ones((1, d+1))))
-            # Controls.
-            aDtk_opt = aDt_opt[:, k]
-            aDtk_opt_nsc = aDt_opt_nsc[:, k]
-            eArmk_opt = eArm_opt[:, k]
-            # Slack controls.
-            Qddsj_opt = Qdds_col_opt[:, k*d:(k+1)*d]
-            Qddsj_opt_nsc = (
-                Qddsj_opt * (scalingQdds.to_numpy().T * np.ones((1, d))))
-            normFDtj_opt = normFDt_col_opt[:, k*d:(k+1)*d] 
-            normFDtj_opt_nsc = (
-                normFDtj_opt * (scalingFDt.to_numpy().T * np.ones((1, d))))
-            # Qs and Qds are intertwined in external function.
-            QsQdskj_opt_nsc = ca.DM(nJoints*2, d+1)
-            QsQdskj_opt_nsc[::2, :] = Qskj_opt_nsc
-            QsQdskj_opt_nsc[1::2, :] = Qdskj_opt_nsc
-            # Loop over collocation points.               
-            for j in range(d):
-                ###############################################################
-                # Passive joint torques.
-                passiveTorquesj_opt = np.zeros((nPassiveTorqueJoints, 1))
-                for cj, joint in enumerate(passiveTorqueJoints):
-                    passiveTorquesj_opt[cj, 0] = f_passiveTorque[joint](
-                        Qskj_opt_nsc[joints.index(joint), j+1], 
-                        Qdskj_opt_nsc[joints.index(joint), j+1])
-                
-                ###############################################################
-                # Polynomial approximations.
-                # Left leg.
-                Qsinj_opt_l = Qskj_opt_nsc[leftPolJointIdx, j+1]
-                Qdsinj_opt_l = Qdskj_opt_nsc[leftPolJointIdx, j+1]
-                [lMTj_opt_l, vMTj_opt_l, _] = f_polynomial(Qsinj_opt_l,
-                                                           Qdsinj_opt_l)       
-                # Right leg.
-                Qsinj_opt_r = Qskj_opt_nsc[rightPolJointIdx, j+1]
-                Qdsinj_opt_r = Qdskj_opt_nsc[rightPolJointIdx, j+1]
-                [lMTj_opt_r, vMTj_opt_r, _] = f_polynomial(Qsinj_opt_r,
-                                                           Qdsinj_opt_r)
-                # Both legs        .
-                lMTj_opt_lr = ca.vertcat(lMTj_opt_l[leftPolMuscleIdx], 
-                                         lMTj_opt_r[rightPolMuscleIdx])
-                vMTj_opt_lr = ca.vertcat(vMTj_opt_l[leftPolMuscleIdx], 
-                                         vMTj_opt_r[rightPolMuscleIdx])
-                
-                ###############################################################
-                # Derive Hill-equilibrium.
-                [hillEquilibriumj_opt, Fj_opt, activeFiberForcej_opt, 
-                 passiveFiberForcej_opt, normActiveFiberLengthForcej_opt, 
-                 normFiberLengthj_opt, fiberVelocityj_opt] = (
-                     f_hillEquilibrium(
-                         akj_opt[:, j+1], lMTj_opt_lr, vMTj_opt_lr,
-                         normFkj_opt_nsc[:, j+1], normFDtj_opt_nsc[:, j]))  
-                
-                ###############################################################
-                # Get metabolic energy rate.
-                [actHeatRatej_opt, mtnHeatRatej_opt, 
-                 shHeatRatej_opt, mechWRatej_opt, _, 
-                 metabolicEnergyRatej_opt] = f_metabolicsBhargava(
-                     akj_opt[:, j+1], akj_opt[:, j+1], 
-                     normFiberLengthj_opt, fiberVelocityj_opt, 
-                     activeFiberForcej_opt, passiveFiberForcej_opt,
-                     normActiveFiberLengthForcej_opt)
-                
-                ###############################################################
-                # Cost function terms.
-                activationTerm_opt = f_NMusclesSum2(akj_opt[:, j+1])  
-                jointAccelerationTerm_opt = f_nNoArmJointsSum2(
-                    Qddsj_opt[idxNoArmJoints, j])          
-                passiveTorqueTerm_opt = f_nPassiveTorqueJointsSum2(
-                    passiveTorquesj_opt)     
-                activationDtTerm_opt = f_NMusclesSum2(aDtk_opt)
-                forceDtTerm_opt = f_NMusclesSum2(normFDtj_opt[:, j])
-                armAccelerationTerm_opt = f_nArmJointsSum2(
-                    Qddsj_opt[idxArmJoints, j])
-                armExcitationTerm_opt = f_nArmJointsSum2(eArmk_opt) 
-                metabolicEnergyRateTerm_opt = (
-                    f_NMusclesSum2(metabolicEnergyRatej_opt) / modelMass)
-                
-                metabolicEnergyRateTerm_opt_all += (
-                    weights['metabolicEnergyRateTerm'] * 
-                    metabolicEnergyRateTerm_opt * h_opt * B[j + 1] / 
-                    distTraveled_opt)
-                activationTerm_opt_all += (
-                    weights['activationTerm'] * activationTerm_opt * 
-                    h_opt * B[j + 1] / distTraveled_opt)
-                armExcitationTerm_opt_all += (
-                    weights['armExcitationTerm'] * armExcitationTerm_opt * 
-                    h_opt * B[j + 1] / distTraveled_opt)
-                jointAccelerationTerm_opt_all += (
-                    weights['jointAccelerationTerm'] * 
-                    jointAccelerationTerm_opt * h_opt * B[j + 1] / 
-                    distTraveled_opt)
-                passiveTorqueTerm_opt_all += (
-                    weights['passiveTorqueTerm'] * passiveTorqueTerm_opt * 
-                    h_opt * B[j + 1] / distTraveled_opt)
-                activationDtTerm_opt_all += (
-                    weights['controls'] * activationDtTerm_opt * h_opt * 
-                    B[j + 1] / distTraveled_opt)
-                forceDtTerm_opt_all += (
-                    weights['controls'] * forceDtTerm_opt * h_opt * 
-                    B[j + 1] / distTraveled_opt)
-                armAccelerationTerm_opt_all += (
-                    weights['controls'] * armAccelerationTerm_opt * 
-                    h_opt * B[j + 1] / distTraveled_opt)
-        
+        # The cost terms only involve values at the d*N collocation points,
+        # which are exactly the columns of the *_col_opt arrays (mesh
+        # interval, then collocation point). Mesh-level controls repeat d
+        # times so that every quantity lines up column by column.
+        aDt_rep_opt = np.repeat(aDt_opt, d, axis=1)
+        eArm_rep_opt = np.repeat(eArm_opt, d, axis=1)
+
+        #######################################################################
+        # Passive joint torques.
+        passiveTorques_col_opt = f_passiveTorque(
+            Qs_col_opt_nsc[idxPassiveTorqueJoints, :],
+            Qds_col_opt_nsc[idxPassiveTorqueJoints, :])
+
+        #######################################################################
+        # Polynomial approximations.
+        f_polynomial_col = f_polynomial.map(d*N)
+        # Left leg.
+        [lMT_col_opt_l, vMT_col_opt_l, _] = f_polynomial_col(
+            Qs_col_opt_nsc[leftPolJointIdx, :].reshape(1, -1, order='F'),
+            Qds_col_opt_nsc[leftPolJointIdx, :].reshape(1, -1, order='F'))
+        # Right leg.
+        [lMT_col_opt_r, vMT_col_opt_r, _] = f_polynomial_col(
+            Qs_col_opt_nsc[rightPolJointIdx, :].reshape(1, -1, order='F'),
+            Qds_col_opt_nsc[rightPolJointIdx, :].reshape(1, -1, order='F'))
+        # Both legs.
+        lMT_col_opt_lr = ca.vertcat(lMT_col_opt_l[leftPolMuscleIdx, :],
+                                    lMT_col_opt_r[rightPolMuscleIdx, :])
+        vMT_col_opt_lr = ca.vertcat(vMT_col_opt_l[leftPolMuscleIdx, :],
+                                    vMT_col_opt_r[rightPolMuscleIdx, :])
+
+        #######################################################################
+        # Derive Hill-equilibrium.
+        [_, _, activeFiberForce_col_opt, passiveFiberForce_col_opt,
+         normActiveFiberLengthForce_col_opt, normFiberLength_col_opt,
+         fiberVelocity_col_opt] = f_hillEquilibrium.map(d*N)(
+             a_col_opt, lMT_col_opt_lr, vMT_col_opt_lr,
+             normF_col_opt_nsc, normFDt_col_opt_nsc)
+
+        #######################################################################
+        # Get metabolic energy rate.
+        metabolicEnergyRate_col_opt = f_metabolicsBhargava.map(d*N)(
+            a_col_opt, a_col_opt, normFiberLength_col_opt,
+            fiberVelocity_col_opt, activeFiberForce_col_opt,
+            passiveFiberForce_col_opt, normActiveFiberLengthForce_col_opt)[5]
+
+        #######################################################################
+        # Cost function terms, one (1, d*N) row per term. The sum-of-squares
+        # functions map columnwise over the matrix arguments.
+        activationTerm_col_opt = f_NMusclesSum2(a_col_opt).full()
+        jointAccelerationTerm_col_opt = f_nNoArmJointsSum2(
+            Qdds_col_opt[idxNoArmJoints, :]).full()
+        passiveTorqueTerm_col_opt = f_nPassiveTorqueJointsSum2(
+            passiveTorques_col_opt).full()
+        activationDtTerm_col_opt = f_NMusclesSum2(aDt_rep_opt).full()
+        forceDtTerm_col_opt = f_NMusclesSum2(normFDt_col_opt).full()
+        armAccelerationTerm_col_opt = f_nArmJointsSum2(
+            Qdds_col_opt[idxArmJoints, :]).full()
+        armExcitationTerm_col_opt = f_nArmJointsSum2(eArm_rep_opt).full()
+        metabolicEnergyRateTerm_col_opt = (
+            f_NMusclesSum2(metabolicEnergyRate_col_opt).full() / modelMass)
+
+        # Quadrature weights per collocation point: B[j+1] repeats per mesh
+        # interval, scaled by the step size and the distance traveled.
+        quadWeights = (
+            np.tile(B[1:], N) * h_opt / distTraveled_opt).reshape(-1, 1)
+
+        metabolicEnergyRateTerm_opt_all = (
+            weights['metabolicEnergyRateTerm'] *
+            metabolicEnergyRateTerm_col_opt @ quadWeights)
+        activationTerm_opt_all = (
+            weights['activationTerm'] * activationTerm_col_opt @
+            quadWeights)
+        armExcitationTerm_opt_all = (
+            weights['armExcitationTerm'] * armExcitationTerm_col_opt @
+            quadWeights)
+        jointAccelerationTerm_opt_all = (
+            weights['jointAccelerationTerm'] * jointAccelerationTerm_col_opt @
+            quadWeights)
+        passiveTorqueTerm_opt_all = (
+            weights['passiveTorqueTerm'] * passiveTorqueTerm_col_opt @
+            quadWeights)
+        activationDtTerm_opt_all = (
+            weights['controls'] * activationDtTerm_col_opt @ quadWeights)
+        forceDtTerm_opt_all = (
+            weights['controls'] * forceDtTerm_col_opt @ quadWeights)
+        armAccelerationTerm_opt_all = (
+            weights['controls'] * armAccelerationTerm_col_opt @
+            quadWeights)
+
         objective_terms = {
-            "metabolicEnergyRateTerm": metabolicEnergyRateTerm_opt_all.full(),
-            "activationTerm": activationTerm_opt_all.full(),
-            "armExcitationTerm": armExcitationTerm_opt_all.full(),
-            "jointAccelerationTerm": jointAccelerationTerm_opt_all.full(),
-            "passiveTorqueTerm": passiveTorqueTerm_opt_all.full(),
-            "activationDtTerm": activationDtTerm_opt_all.full(),
-            "forceDtTerm": forceDtTerm_opt_all.full(),
-            "armAccelerationTerm": armAccelerationTerm_opt_all.full()}
-        
-        JAll_opt = (metabolicEnergyRateTerm_opt_all.full() +
-                     activationTerm_opt_all.full() + 
-                     armExcitationTerm_opt_all.full() +
-                     jointAccelerationTerm_opt_all.full() + 
-                     passiveTorqueTerm_opt_all.full() + 
-                     activationDtTerm_opt_all.full() + 
-                     forceDtTerm_opt_all.full() + 
-                     armAccelerationTerm_opt_all.full())
+            "metabolicEnergyRateTerm": metabolicEnergyRateTerm_opt_all,
+            "activationTerm": activationTerm_opt_all,
+            "armExcitationTerm": armExcitationTerm_opt_all,
+            "jointAccelerationTerm": jointAccelerationTerm_opt_all,
+            "passiveTorqueTerm": passiveTorqueTerm_opt_all,
+            "activationDtTerm": activationDtTerm_opt_all,
+            "forceDtTerm": forceDtTerm_opt_all,
+            "armAccelerationTerm": armAccelerationTerm_opt_all}
+
+        JAll_opt = (metabolicEnergyRateTerm_opt_all +
+                     activationTerm_opt_all +
+                     armExcitationTerm_opt_all +
+                     jointAccelerationTerm_opt_all +
+                     passiveTorqueTerm_opt_all +
+                     activationDtTerm_opt_all +
+                     forceDtTerm_opt_all +
+                     armAccelerationTerm_opt_all)
         
         if stats['success'] == True:
             assert np.all(
@@ -1757,16 +1753,16 @@ for case in cases:
             GRF_GC_toPrint = np.copy(GRF_GC)
             COP_GC_toPrint = np.copy(COP_GC)
             freeT_GC_toPrint = np.copy(freeT_GC)            
-            idx_r = np.argwhere(GRF_GC_toPrint[1, :] < 30)
-            for tr in range(idx_r.shape[0]):
-                GRF_GC_toPrint[:3, idx_r[tr, 0]] = 0
-                COP_GC_toPrint[:3, idx_r[tr, 0]] = 0
-                freeT_GC_toPrint[:3, idx_r[tr, 0]] = 0
-            idx_l = np.argwhere(GRF_GC_toPrint[4, :] < 30)
-            for tl in range(idx_l.shape[0]):
-                GRF_GC_toPrint[3:, idx_l[tl, 0]] = 0
-                COP_GC_toPrint[3:, idx_l[tl, 0]] = 0
-                freeT_GC_toPrint[3:, idx_l[tl, 0]] = 0         
+            # Zero out swing-phase frames (vertical force below threshold)
+            # with boolean masks.
+            idx_r = GRF_GC_toPrint[1, :] < 30
+            GRF_GC_toPrint[:3, idx_r] = 0
+            COP_GC_toPrint[:3, idx_r] = 0
+            freeT_GC_toPrint[:3, idx_r] = 0
+            idx_l = GRF_GC_toPrint[4, :] < 30
+            GRF_GC_toPrint[3:, idx_l] = 0
+            COP_GC_toPrint[3:, idx_l] = 0
+            freeT_GC_toPrint[3:, idx_l] = 0
             grf_cop_Labels = [
                 'r_ground_force_vx', 'r_ground_force_vy', 'r_ground_force_vz',
                 'r_ground_force_px', 'r_ground_force_py', 'r_ground_force_pz',
@@ -1786,16 +1782,20 @@ for case in cases:
             numpy2storage(labels, data, os.path.join(pathResults, 'GRF.mot'))
             
         # %% Save optimal trajectories for further analysis.
-        if saveOptimalTrajectories: 
+        if saveOptimalTrajectories:
+            # Wait for a previous case's background write before reading the
+            # aggregate file back in.
+            if pendingTrajectorySave is not None:
+                pendingTrajectorySave.result()
             if not os.path.exists(os.path.join(pathTrajectories,
-                                               'optimaltrajectories.npy')): 
+                                               'optimaltrajectories.npy')):
                     optimaltrajectories = {}
-            else:  
+            else:
                 optimaltrajectories = np.load(
                         os.path.join(pathTrajectories,
                                      'optimaltrajectories.npy'),
-                        allow_pickle=True)   
-                optimaltrajectories = optimaltrajectories.item()                
+                        allow_pickle=True)
+                optimaltrajectories = optimaltrajectories.item()
             GC_percent = np.linspace(1, 100, 2*N)            
             optimaltrajectories[case] = {
                                 'coordinate_values': Qs_GC, 
@@ -1819,6 +1819,13 @@ for case in cases:
                                 'objective_terms': objective_terms,
                                 'iter_count': stats['iter_count'],
                                 "stride_length": stride_length_GC}              
-            np.save(os.path.join(pathTrajectories, 'optimaltrajectories.npy'),
-                    optimaltrajectories)
+            pendingTrajectorySave = trajectorySavePool.submit(
+                np.save,
+                os.path.join(pathTrajectories, 'optimaltrajectories.npy'),
+                optimaltrajectories)
+
+# Surface any error from the last background write; the pool's shutdown
+# otherwise swallows it.
+if pendingTrajectorySave is not None:
+    pendingTrajectorySave.result()
             
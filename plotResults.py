@@ -6,7 +6,9 @@
 # %% Import packages.
 import os
 import numpy as np
-import matplotlib.pyplot as plt  
+import matplotlib.pyplot as plt
+
+from utilities import loadPickledDict
 
 # %% User inputs
 cases = ['40']
@@ -15,13 +17,12 @@ cases = ['40']
 pathMain = os.getcwd()
 # Load results
 pathTrajectories = os.path.join(pathMain, 'Results')
-optimaltrajectories = np.load(os.path.join(pathTrajectories, 
-                                           'optimalTrajectories.npy'),
-                              allow_pickle=True).item()
+optimaltrajectories = loadPickledDict(os.path.join(pathTrajectories, 
+                                                   'optimalTrajectories.npy'))
 # Load experimental data
 pathData = os.path.join(pathMain, 'OpenSimModel', 'new_model')
-experimentalData = np.load(os.path.join(pathData, 'experimentalData.npy'),
-                           allow_pickle=True).item()
+experimentalData = loadPickledDict(os.path.join(pathData, 
+                                                'experimentalData.npy'))
 subject = 'new_model'
 
 # %% Joint positions.
@@ -48,7 +49,7 @@ for i, ax in enumerate(axs.flat):
                 continue            
             c_joint_idx = c_joints.index(jointToPlot[i])             
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['coordinate_values'][c_joint_idx:c_joint_idx+1, :].T, c=next(color), label='case_' + case)
+                    optimaltrajectories[case]['coordinate_values'][c_joint_idx, :], c=next(color), label='case_' + case)
             if plotExperimental:
                 ax.fill_between(experimentalData[subject]["kinematics"]["positions"]["GC_percent"],
                             experimentalData[subject]["kinematics"]["positions"]["mean"][jointToPlot[i]] + 2*experimentalData[subject]["kinematics"]["positions"]["std"][jointToPlot[i]],
@@ -123,7 +124,7 @@ for i, ax in enumerate(axs.flat):
         plotExperimental = True
         for case in cases:
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i]:idxMusclesToPlot[i]+1, :].T, c=next(color), label='case_' + case)            
+                    optimaltrajectories[case]['muscle_activations'][idxMusclesToPlot[i], :], c=next(color), label='case_' + case)            
             if musclesToPlot[i] in mappingEMG and plotExperimental:                
                 # Normalize EMG such that peak mean EMG = peak activation             
                 exp_mean = experimentalData[subject]["EMG"]["mean"][mappingEMG[musclesToPlot[i]]]
@@ -157,7 +158,7 @@ for i, ax in enumerate(axs.flat):
                 continue
             c_joint_idx = c_joints.index(jointToPlot[i]) 
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['joint_torques'][c_joint_idx:c_joint_idx+1, :].T, c=next(color), label='case_' + case)
+                    optimaltrajectories[case]['joint_torques'][c_joint_idx, :], c=next(color), label='case_' + case)
             if plotExperimental:
                 ax.fill_between(experimentalData[subject]["kinetics"]["GC_percent"],
                             experimentalData[subject]["kinetics"]["mean"][jointToPlot[i]] + 2*experimentalData[subject]["kinetics"]["std"][jointToPlot[i]],
@@ -182,7 +183,7 @@ for i, ax in enumerate(axs.flat):
     plotExperimental = True
     for case in cases:
         ax.plot(optimaltrajectories[case]['GC_percent'],
-                optimaltrajectories[case]['GRF'][idxGRFToPlot[i]:idxGRFToPlot[i]+1, :].T, c=next(color), label='case_' + case) 
+                optimaltrajectories[case]['GRF'][idxGRFToPlot[i], :], c=next(color), label='case_' + case) 
         if plotExperimental:
             ax.fill_between(experimentalData[subject]["GRF"]["GC_percent"],
                             experimentalData[subject]["GRF"]["mean"][GRFToPlot[i]] + 2*experimentalData[subject]["GRF"]["std"][GRFToPlot[i]],
@@ -223,7 +224,7 @@ for i, ax in enumerate(axs.flat):
     if i < NMusclesToPlot:
         for case in cases:
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['norm_fiber_lengths'][idxMusclesToPlot[i]:idxMusclesToPlot[i]+1, :].T, c=next(color), label='case_' + case)
+                    optimaltrajectories[case]['norm_fiber_lengths'][idxMusclesToPlot[i], :], c=next(color), label='case_' + case)
         ax.set_title(muscles[idxMusclesToPlot[i]])
         ax.set_ylim((0,2))
         handles, labels = ax.get_legend_handles_labels()
@@ -242,7 +243,7 @@ for i, ax in enumerate(axs.flat):
     if i < NMusclesToPlot:
         for case in cases:
             ax.plot(optimaltrajectories[case]['GC_percent'],
-                    optimaltrajectories[case]['fiber_velocity'][idxMusclesToPlot[i]:idxMusclesToPlot[i]+1, :].T, c=next(color), label='case_' + case)
+                    optimaltrajectories[case]['fiber_velocity'][idxMusclesToPlot[i], :], c=next(color), label='case_' + case)
         ax.set_title(muscles[idxMusclesToPlot[i]])
         ax.set_ylim((-1,1))
         handles, labels = ax.get_legend_handles_labels()
@@ -261,8 +261,9 @@ def getPolynomialCoefficients(pathCoordinates, pathMuscleAnalysis, joints,
                               threshold=0.003):
     
     # Get joint coordinates.
-    from utilities import getIK
-    jointCoordinates = (getIK(pathCoordinates, joints)[0]).to_numpy()[:,1::]
+    from utilities import getIKCached
+    jointCoordinates = (
+        getIKCached(pathCoordinates, joints)[0]).to_numpy()[:,1::]
     
     # Get muscle-tendon lengths.
     from utilities import getFromStorage
@@ -354,8 +355,9 @@ def testPolynomials(pathCoordinates, pathMuscleAnalysis, joints, muscles,
                     trunkMomentArmPolynomialIndices=[]):
     
     # Get joint coordinates.
-    from utilities import getIK
-    jointCoordinates = (getIK(pathCoordinates, joints)[0]).to_numpy()[:,1::]
+    from utilities import getIKCached
+    jointCoordinates = (
+        getIKCached(pathCoordinates, joints)[0]).to_numpy()[:,1::]
     
     # Get muscle-tendon lengths.
     from utilities import getFromStorage
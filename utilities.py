@@ -4,12 +4,27 @@
 '''
 
 # %% Import packages.
+import os
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 from scipy import signal
 from scipy.interpolate import interp1d
 import casadi as ca
-import matplotlib.pyplot as plt  
+import matplotlib.pyplot as plt
+
+# Numba is optional: when available, numerical kernels below are JIT-compiled
+# (cache=True keeps the compiled code across runs); otherwise they fall back
+# to their pure-NumPy implementations.
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        def decorator(func):
+            return func
+        return decorator
 
 # %% Storage file to numpy array.
 # Found here: https://github.com/chrisdembia/perimysium/
@@ -99,6 +114,18 @@ def getIK(storage_file, joints, degrees=False):
     
     return Qs, QsFilt
 
+# %% Cached variant of getIK. The same motion file is parsed and filtered
+# by several cases and scripts; cache the result keyed on the file path and
+# joint tuple, and hand out copies so that callers cannot mutate the cache.
+@lru_cache(maxsize=8)
+def _getIKCached(storage_file, joints, degrees=False):
+    return getIK(storage_file, list(joints), degrees)
+
+def getIKCached(storage_file, joints, degrees=False):
+    Qs, QsFilt = _getIKCached(storage_file, tuple(joints), degrees)
+    
+    return Qs.copy(), QsFilt.copy()
+
 # %% Extract activations from storage file.
 def getActivations(storage_file, muscles):
     # Extract data
@@ -180,13 +207,106 @@ def getCOP(GRF, GRM):
     
     return COP, torques
 
+# %% Save a nested dict of arrays as a flat npz file.
+def saveDict2Npz(nestedDict, npz_file):
+
+    flatDict = {}
+    def flatten(d, prefix):
+        for key, value in d.items():
+            name = prefix + '/' + str(key) if prefix else str(key)
+            if isinstance(value, dict):
+                flatten(value, name)
+            elif isinstance(value, pd.DataFrame):
+                # savez would silently coerce a DataFrame to a bare ndarray,
+                # losing the labels; store the pieces and rebuild on load.
+                flatDict[name + '/__df__/values'] = value.to_numpy()
+                for axis in ('columns', 'index'):
+                    labels = np.asarray(getattr(value, axis))
+                    if labels.dtype == object:
+                        # String labels come out as object arrays; store
+                        # them as fixed-width strings instead.
+                        labels = labels.astype(str)
+                    flatDict[name + '/__df__/' + axis] = labels
+            else:
+                value = np.asarray(value)
+                if value.dtype == object:
+                    # Would only be storable through pickle, which defeats
+                    # the purpose of the npz; let the caller keep the npy.
+                    raise TypeError(
+                        'cannot store {} without pickle'.format(name))
+                flatDict[name] = value
+    flatten(nestedDict, '')
+    np.savez(npz_file, **flatDict)
+
+# %% Load a flat npz file back into a nested dict.
+def loadNpz2Dict(npz_file, subtrees=None):
+
+    # When subtrees is given (e.g. ['new_model/kinematics']), only entries
+    # under those '/'-joined prefixes are materialized; the rest of the file
+    # is never decompressed.
+    data = np.load(npz_file)
+    nestedDict = {}
+    for name in data.files:
+        if subtrees is not None and not any(
+                name == s or name.startswith(s + '/') for s in subtrees):
+            continue
+        keys = name.split('/')
+        d = nestedDict
+        for key in keys[:-1]:
+            d = d.setdefault(key, {})
+        value = data[name]
+        # Restore scalars and string lists, which savez stored as arrays.
+        if value.ndim == 0:
+            value = value.item()
+        elif value.dtype.kind in 'US':
+            value = value.tolist()
+        d[keys[-1]] = value
+
+    # Rebuild the DataFrames that saveDict2Npz stored piecewise.
+    def rebuild(d):
+        for key, value in d.items():
+            if isinstance(value, dict):
+                if '__df__' in value:
+                    parts = value['__df__']
+                    d[key] = pd.DataFrame(parts['values'],
+                                          columns=parts['columns'],
+                                          index=parts['index'])
+                else:
+                    rebuild(value)
+    rebuild(nestedDict)
+
+    return nestedDict
+
+# %% Load a pickled nested dict, caching it as a flat npz for fast reloads.
+def loadPickledDict(npy_file, subtrees=None):
+
+    # allow_pickle=True routes np.load through Python's pickle, which is slow
+    # for these large dicts. On first load we therefore flatten the dict into
+    # an npz sitting next to the npy; subsequent loads read the raw arrays
+    # without unpickling, restricted to the requested subtrees (if any).
+    npz_file = npy_file[:-4] + '_flat.npz'
+    if (os.path.exists(npz_file) and
+            os.path.getmtime(npz_file) >= os.path.getmtime(npy_file)):
+        return loadNpz2Dict(npz_file, subtrees)
+    data = np.load(npy_file, allow_pickle=True).item()
+    try:
+        saveDict2Npz(data, npz_file)
+    except (ValueError, TypeError):
+        # Some leaf could not be stored without pickle; keep the npy path.
+        pass
+
+    return data
+
 # %% Get indices from list.
 def getJointIndices(joints, selectedJoints):
-    
-    jointIndices = []
-    for joint in selectedJoints:
-        jointIndices.append(joints.index(joint))
-            
+
+    # Build the name -> index map once such that the lookup is O(N+M) rather
+    # than O(N*M) with repeated list.index calls.
+    jointIndicesMap = {joint: i for i, joint in enumerate(joints)}
+    jointIndices = np.fromiter((jointIndicesMap[joint]
+                                for joint in selectedJoints),
+                               dtype=np.intp, count=len(selectedJoints))
+
     return jointIndices
 
 # %% Get moment arm indices.
@@ -207,6 +327,12 @@ def getMomentArmIndices(rightMuscles, leftPolynomialJoints,
                 momentArmIndices.setdefault(
                         rightPolynomialJoints[i], []).append(
                                 count + len(rightMuscles))                
+    # Convert to integer arrays (cf getJointIndices): the indices are used
+    # for NumPy and CasADi matrix indexing, where arrays avoid a per-use
+    # conversion from Python lists.
+    for joint in momentArmIndices:
+        momentArmIndices[joint] = np.asarray(momentArmIndices[joint],
+                                             dtype=np.intp)
         
     return momentArmIndices
 
@@ -405,6 +531,28 @@ def plotParametersVSBounds(y,lb,ub,title='',xticklabels=[]):
     ax.set_xticklabels(xticklabels) 
     ax.set_title(title)
     
+# %% Redraw line artists on a cached background using blitting.
+def blitLines(fig, lines):
+    """Redraw only the given Line2D artists on top of a cached background
+    instead of recompositing the full figure. The background (axes, spines,
+    experimental bands, ...) is captured on first use and reused across
+    calls, so when a figure is regenerated across many cases only the
+    per-case lines are redrawn.
+    Typical use: plot the static content, plot the per-case lines with
+    animated=True while collecting their handles, then call
+    blitLines(fig, lines) after updating the line data for each new case.
+    """
+    canvas = fig.canvas
+    background = getattr(fig, '_blitBackground', None)
+    if background is None:
+        canvas.draw()
+        background = canvas.copy_from_bbox(fig.bbox)
+        fig._blitBackground = background
+    canvas.restore_region(background)
+    for line in lines:
+        line.axes.draw_artist(line)
+    canvas.blit(fig.bbox)
+
 # %% Calculate number of subplots.
 def nSubplots(N):
     
@@ -441,15 +589,18 @@ def getIdxIC_3D(GRF_opt, threshold):
     return idxIC, legIC
       
 # %% Compute RMSE.      
+@njit(cache=True)
 def getRMSE(predictions, targets):
     return np.sqrt(((predictions - targets) ** 2).mean())
 
 # %% Compute RMSE normalized by signal range.
+@njit(cache=True)
 def getRMSENormMinMax(predictions, targets):    
     ROM = np.max(targets) - np.min(targets)    
     return (np.sqrt(((predictions - targets) ** 2).mean()))/ROM
 
 # %% Compute RMSE normalized by standard deviation.
+@njit(cache=True)
 def getRMSENormStd(predictions, targets):    
     std = np.std(targets)
     return (np.sqrt(((predictions - targets) ** 2).mean()))/std